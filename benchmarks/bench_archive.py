@@ -0,0 +1,48 @@
+"""Compare ingest into the default schema and the "archive" schema profile.
+
+The same runs are added, one after the other, to a database with the default schema
+(unique index and foreign keys on `result`) and to an archive without them, where
+each batch is validated in bulk instead. The time to add each run, and the size of
+the file at the end, are reported.
+
+Usage:
+
+    python benchmarks/bench_archive.py --runs 10 --years 100
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from common import make_run_frame
+
+from csdb import Client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--years", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="csdb") as TEMP:
+        print(f"{'profile':<10}{'first run':>12}{'last run':>12}{'file size':>12}")
+        for profile in ("default", "archive"):
+            dst = Path(TEMP) / f"{profile}.db"
+            client = Client(dst, schema_profile=profile)
+            code_names = client.get_table_as_dataframe("variable")["code_name"]
+            times = list()
+            with client:
+                for i in range(args.runs):
+                    df = make_run_frame(code_names.tolist(), years=args.years, seed=i)
+                    df["run"] = f"RUN{i}"
+                    start = time.perf_counter()
+                    client.put_run_from_dataframe(f"RUN{i}", df)
+                    times.append(time.perf_counter() - start)
+            size = dst.stat().st_size / 2**20
+            print(f"{profile:<10}{times[0]:>11.2f}s{times[-1]:>11.2f}s{size:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compare per-call latency of an open-per-call client and a persistent client.
+
+Usage:
+
+    python benchmarks/bench_connection.py --runs 5 --calls 50
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from common import make_database, timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--years", type=int, default=100)
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="csdb") as TEMP:
+        client, _, code_names = make_database(
+            Path(TEMP) / "bench.db",
+            runs=args.runs,
+            years=args.years,
+        )
+        code_names = code_names[: args.calls]
+
+        def by_variable():
+            for code_name in code_names:
+                client.get_result_by_variable(code_name)
+
+        def by_lookup():
+            for code_name in code_names:
+                client.get_variable(code_name)
+
+        per_call = timeit(by_variable, repeat=3) / len(code_names)
+        lookup = timeit(by_lookup, repeat=3) / len(code_names)
+        with client.open(read_only=True):
+            per_call_open = timeit(by_variable, repeat=3) / len(code_names)
+            lookup_open = timeit(by_lookup, repeat=3) / len(code_names)
+
+    print(f"{'method':<24}{'per-call':>12}{'open':>12}{'speedup':>10}")
+    for name, closed, opened in (
+        ("get_result_by_variable", per_call, per_call_open),
+        ("get_variable", lookup, lookup_open),
+    ):
+        print(
+            f"{name:<24}{closed * 1e3:>10.2f}ms{opened * 1e3:>10.2f}ms"
+            + f"{closed / opened:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compare the "dense" and "dedup" schema profiles on a study of alternatives.
+
+Every alternative is a copy of the baseline run with a fraction of its variables
+changed, the way most CalSim alternatives only change part of the system. The time
+to add all the runs, the time to read one of them, and the size of the file are
+reported.
+
+Usage:
+
+    python benchmarks/bench_dedup.py --runs 20 --changed 0.1
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from common import make_run_frame, timeit
+
+from csdb import Client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--years", type=int, default=100)
+    parser.add_argument("--changed", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="csdb") as TEMP:
+        print(f"{'profile':<10}{'write':>10}{'read run':>12}{'file size':>12}")
+        for profile in ("dense", "dedup"):
+            dst = Path(TEMP) / f"{profile}.db"
+            client = Client(dst, schema_profile=profile)
+            code_names = client.get_table_as_dataframe("variable")["code_name"]
+            base = make_run_frame(code_names.tolist(), years=args.years)
+            rng = np.random.default_rng(0)
+            start = time.perf_counter()
+            with client:
+                for i in range(args.runs):
+                    df = base.copy()
+                    changed = rng.choice(
+                        code_names,
+                        size=int(args.changed * len(code_names)),
+                        replace=False,
+                    )
+                    df.loc[df["variable"].isin(changed), "value"] *= 1.1
+                    df["run"] = f"RUN{i}"
+                    client.put_run_from_dataframe(f"RUN{i}", df)
+            write = time.perf_counter() - start
+            size = dst.stat().st_size / 2**20
+            with client.open(read_only=True):
+                read = timeit(lambda: client.get_result_by_run("RUN0"), repeat=3)
+            print(f"{profile:<10}{write:>9.2f}s{read:>11.2f}s{size:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compare reading across study databases with one client each and federated.
+
+Several study databases are created, and the same variable is read from every run
+of every study: with a `csdb.Client` for each study and the frames concatenated in
+pandas, and with one `csdb.FederatedClient` over all of them.
+
+Usage:
+
+    python benchmarks/bench_federated.py --studies 4 --runs 4
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from common import make_database, timeit
+
+from csdb import Client, FederatedClient
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--studies", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=4)
+    parser.add_argument("--years", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="csdb") as TEMP:
+        studies = dict()
+        for i in range(args.studies):
+            studies[f"STUDY{i}"] = Path(TEMP) / f"study{i}.db"
+            _, _, code_names = make_database(
+                studies[f"STUDY{i}"], runs=args.runs, years=args.years
+            )
+        code_name = code_names[0]
+
+        def separate():
+            frames = list()
+            for study, src in studies.items():
+                _, _, df = Client(src).get_result_by_variable(code_name)
+                frames.append(df.add_prefix(f"{study}/"))
+            return pd.concat(frames, axis=1)
+
+        def federated():
+            _, _, df = FederatedClient(studies).get_result_by_variable(code_name)
+            return df
+
+        assert separate().shape == federated().shape
+        print(f"{'method':<12}{'per-read':>12}")
+        for name, func in (("separate", separate), ("federated", federated)):
+            print(f"{name:<12}{timeit(func, repeat=5) * 1e3:>10.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Compare the DataFrame and temporary csv ingest paths of `put_run_from_dataframe`.
+
+Usage:
+
+    python benchmarks/bench_ingest.py --years 100
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from common import make_run_frame
+
+from csdb import Client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="csdb") as TEMP:
+        client = Client(Path(TEMP) / "bench.db")
+        code_names = client.get_table_as_dataframe("variable")["code_name"].tolist()
+        df = make_run_frame(code_names, years=args.years)
+        df["run"] = "RUN"
+        print(f"{len(df):,} rows per run")
+        with client:
+            for method in ("csv", "frame"):
+                start = time.perf_counter()
+                client.put_run_from_dataframe(f"RUN_{method}", df.copy(), method=method)
+                elapsed = time.perf_counter() - start
+                print(f"{method:<8}{elapsed:>8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""Compare the default, row-per-value layout with the "dense" schema profile.
+
+The same runs are added to a database with the default schema and to one with the
+dense layout, where each timeseries is stored as one array. The size of each file,
+and the time to read every result of a run, are reported.
+
+Usage:
+
+    python benchmarks/bench_layout.py --runs 4 --years 100
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from common import make_run_frame, timeit
+
+from csdb import Client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=4)
+    parser.add_argument("--years", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="csdb") as TEMP:
+        print(f"{'profile':<10}{'write':>10}{'read run':>12}{'file size':>12}")
+        for profile in ("default", "dense"):
+            dst = Path(TEMP) / f"{profile}.db"
+            client = Client(dst, schema_profile=profile)
+            code_names = client.get_table_as_dataframe("variable")["code_name"]
+            start = time.perf_counter()
+            with client:
+                for i in range(args.runs):
+                    df = make_run_frame(code_names.tolist(), years=args.years, seed=i)
+                    df["run"] = f"RUN{i}"
+                    client.put_run_from_dataframe(f"RUN{i}", df)
+            write = time.perf_counter() - start
+            size = dst.stat().st_size / 2**20
+            with client.open(read_only=True):
+                read = timeit(lambda: client.get_result_by_run("RUN0"), repeat=3)
+            print(f"{profile:<10}{write:>9.2f}s{read:>11.2f}s{size:>10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compare building the DSS ledger through a wide table with the one-pass builder.
+
+Point it at a full CalSim3 DSS file to measure a real run, by default it uses 449
+synthetic 100-year monthly series so it runs anywhere. Wall time and peak (traced) memory are
+reported for the old concat/melt approach and the `_LedgerBuilder` used by
+`csdb.io.load_dss`. The DSS records are read once up front, so only the assembly
+step is measured.
+
+Usage:
+
+    python benchmarks/bench_load_dss.py --dss path/to/calsim3_dv.dss
+"""
+
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from csdb import io
+
+
+def synthetic_frames(count: int = 449, years: int = 100) -> list[pd.Series]:
+    rng = np.random.default_rng(0)
+    index = pd.date_range("1921-10-31", periods=12 * years, freq="ME")
+    return [
+        pd.Series(rng.random(len(index)), index=index, name=f"VAR{i}")
+        for i in range(count)
+    ]
+
+
+def concat_melt(frames: list[pd.Series]) -> pd.DataFrame:
+    df = pd.concat(frames, axis=1)
+    df.index.name = "datetime"
+    df.index = pd.to_datetime(df.index)
+    return (
+        df.melt(value_name="value", var_name="variable", ignore_index=False)
+        .dropna()
+        .reset_index()
+    )
+
+
+def builder(frames: list[pd.Series]) -> pd.DataFrame:
+    return io._series_to_ledger(frames, expected_series=len(frames))
+
+
+def measure(func, frames) -> tuple[float, float, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = func(frames)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20, len(df)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dss", type=Path, default=None)
+    args = parser.parse_args()
+
+    if args.dss is None:
+        frames = synthetic_frames()
+        print(f"{len(frames)} synthetic series")
+    else:
+        with io.DssReader(args.dss) as reader:
+            frames = list(reader.iter_series())
+        print(f"{len(frames)} series from {args.dss.name}")
+    print(f"{'method':<16}{'time':>10}{'peak':>12}{'rows':>12}")
+    for name, func in (
+        ("concat/melt", concat_melt),
+        ("builder", builder),
+    ):
+        elapsed, peak, rows = measure(func, frames)
+        print(f"{name:<16}{elapsed * 1e3:>8.1f}ms{peak:>10.1f}MB{rows:>12,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare the throughput of variable lookups with formatted and prepared SQL.
+
+All three methods run on the same open connection. "formatted" is the SQL that
+`get_variable` used to build, with the code name formatted into the text,
+"parameterized" binds the code name but parses the query on every call, and
+"client" is `Client.get_variable` on an open client, which re-uses the statement it
+parsed for the first call.
+
+Usage:
+
+    python benchmarks/bench_lookups.py --calls 2000
+"""
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from common import timeit
+
+from csdb import Client, schemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="csdb") as TEMP:
+        client = Client(Path(TEMP) / "bench.db")
+        code_names = client.get_table_as_dataframe("variable")["code_name"].tolist()
+        code_names = (code_names * (args.calls // len(code_names) + 1))[: args.calls]
+        with client.open(read_only=True):
+            conn = client._cursor()
+
+            def formatted():
+                for code_name in code_names:
+                    df = conn.sql(
+                        "SELECT name, code_name, kind, units FROM variable"
+                        + f" WHERE code_name = '{code_name}'"
+                    ).to_df()
+                    schemas.Variable.model_validate(df.loc[0, :].to_dict())
+
+            def parameterized():
+                for code_name in code_names:
+                    name, code_name, kind, units = conn.execute(
+                        "SELECT name, code_name, kind, units FROM variable"
+                        + " WHERE code_name = ?;",
+                        [code_name],
+                    ).fetchone()
+                    schemas.Variable(
+                        name=name, code_name=code_name, kind=kind, units=units
+                    )
+
+            def prepared():
+                for code_name in code_names:
+                    client.get_variable(code_name)
+
+            results = [
+                (name, timeit(func, repeat=3))
+                for name, func in (
+                    ("formatted", formatted),
+                    ("parameterized", parameterized),
+                    ("client", prepared),
+                )
+            ]
+
+    print(f"{'method':<16}{'per-call':>12}{'lookups/s':>12}")
+    for name, elapsed in results:
+        print(
+            f"{name:<16}{elapsed / len(code_names) * 1e6:>10.1f}us"
+            + f"{len(code_names) / elapsed:>12,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
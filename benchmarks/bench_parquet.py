@@ -0,0 +1,56 @@
+"""Compare reads from a database file with reads from its Parquet export.
+
+A database with several runs is exported with `Client.export_parquet`, and the
+same reads are timed with `csdb.Client` on the file and `csdb.ParquetClient` on the
+dataset: a whole run, one variable across every run, and a long query of a few
+variables in one run.
+
+Usage:
+
+    python benchmarks/bench_parquet.py --runs 8 --years 100
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from common import make_database, timeit
+
+from csdb import ParquetClient
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=8)
+    parser.add_argument("--years", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="csdb") as TEMP:
+        client, run_names, code_names = make_database(
+            Path(TEMP) / "bench.db", runs=args.runs, years=args.years
+        )
+        dst = Path(TEMP) / "study"
+        start = time.perf_counter()
+        stats = client.export_parquet(dst)
+        export = time.perf_counter() - start
+        size = stats["file_size_bytes"].sum() / 2**20
+        print(f"exported {len(stats)} files, {size:.1f}MB, in {export:.2f}s")
+
+        readers = {"duckdb": client, "parquet": ParquetClient(dst)}
+        reads = {
+            "run": lambda c: c.get_result_by_run(run_names[-1]),
+            "variable": lambda c: c.get_result_by_variable(code_names[0]),
+            "query": lambda c: c.query(runs=run_names[-1], variables=code_names[:5]),
+        }
+        print(f"{'read':<10}" + "".join(f"{name:>12}" for name in readers))
+        for read_name, read in reads.items():
+            times = list()
+            for reader in readers.values():
+                with reader.open(read_only=True):
+                    times.append(timeit(lambda: read(reader), repeat=5))
+            print(f"{read_name:<10}" + "".join(f"{t * 1e3:>10.1f}ms" for t in times))
+
+
+if __name__ == "__main__":
+    main()
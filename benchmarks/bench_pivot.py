@@ -0,0 +1,131 @@
+"""Compare reshaping a run to a wide table in pandas with the PIVOT done by duckdb.
+
+Wall time and peak memory are reported for fetching the long result and calling
+`DataFrame.pivot`, the approach `get_result_by_run` used to take, and for
+`get_result_by_run` itself. The default database has one run of the 449 default
+variables over 100 years.
+
+Each method runs in a new process, and the peak is the peak resident memory of that
+process during a call, above what it used before the call. This includes the memory
+duckdb allocates itself, for the long intermediate result and the PIVOT, which
+Python's `tracemalloc` can't see. On Windows, `psutil` is needed to read the peak,
+it's in the `benchmarks` optional dependencies. Without it only the time is reported.
+
+Usage:
+
+    python benchmarks/bench_pivot.py --years 100
+"""
+
+import argparse
+import math
+import multiprocessing
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from statistics import median
+
+from common import make_database
+
+from csdb import Client
+
+
+def reset_peak_rss():
+    """Reset the peak resident memory of this process to its current value."""
+    if sys.platform == "linux":
+        Path("/proc/self/clear_refs").write_text("5")
+
+
+def rss() -> tuple[float, float]:
+    """Return the current and peak resident memory of this process in MB."""
+    if sys.platform == "linux":
+        status = dict(
+            line.split(":", 1)
+            for line in Path("/proc/self/status").read_text().splitlines()
+        )
+        return tuple(float(status[k].split()[0]) / 2**10 for k in ("VmRSS", "VmHWM"))
+    if sys.platform == "win32":
+        try:
+            import psutil
+        except ImportError:
+            warnings.warn("psutil is not installed, the peak memory is not measured")
+            return math.nan, math.nan
+
+        info = psutil.Process().memory_info()
+        return info.rss / 2**20, info.peak_wset / 2**20
+    import resource  # macOS, where ru_maxrss is in bytes
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**20
+    return peak, peak
+
+
+def pandas_pivot(client: Client, run_name: str):
+    with client._connect() as conn:
+        df = conn.execute(
+            """SELECT
+                result.datetime AS datetime,
+                variable.code_name AS variable,
+                result.value AS value,
+            FROM result
+            JOIN run ON result.run_id = run.id
+            JOIN variable ON result.variable_id = variable.id
+            WHERE run.name = ?;""",
+            [run_name],
+        ).df()
+    return df.pivot(index="datetime", columns="variable", values="value")
+
+
+def duckdb_pivot(client: Client, run_name: str):
+    _, _, df = client.get_result_by_run(run_name)
+    return df
+
+
+def measure(
+    method: str,
+    src: Path,
+    run_name: str,
+    repeat: int,
+) -> tuple[float, float, tuple[int, int]]:
+    # Runs in a new process, so that the peak belongs to this method alone. The
+    # peak of each call is measured from the memory in use before it.
+    func = {"pandas pivot": pandas_pivot, "duckdb pivot": duckdb_pivot}[method]
+    client = Client(src).open(read_only=True)
+    client.get_table_as_dataframe("run")  # open the file and load the catalog
+    times = list()
+    peaks = list()
+    for _ in range(repeat):
+        reset_peak_rss()
+        before, _ = rss()
+        start = time.perf_counter()
+        df = func(client, run_name)
+        times.append(time.perf_counter() - start)
+        peaks.append(rss()[1] - before)
+        shape = df.shape
+        del df
+    client.close()
+    return median(times), median(peaks), shape
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--years", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="csdb") as TEMP:
+        src = Path(TEMP) / "bench.db"
+        _, run_names, _ = make_database(src, runs=1, years=args.years)
+
+        print(f"{'method':<16}{'time':>10}{'peak':>12}{'shape':>16}")
+        context = multiprocessing.get_context("spawn")
+        for name in ("pandas pivot", "duckdb pivot"):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                future = pool.submit(measure, name, src, run_names[0], args.repeat)
+                elapsed, peak, shape = future.result()
+            print(f"{name:<16}{elapsed * 1e3:>8.1f}ms{peak:>10.1f}MB{shape!s:>16}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Measure bulk loading of large variable tables with `put_variables_from_dataframe`.
+
+Usage:
+
+    python benchmarks/bench_variables.py --sizes 10000 50000 100000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from csdb import Client
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    print(f"{'variables':>10}{'load':>10}{'rate':>16}")
+    for size in args.sizes:
+        df = pd.DataFrame(
+            {
+                "name": [f"Decision Variable {i}" for i in range(size)],
+                "code_name": [f"DV_{i:06d}" for i in range(size)],
+                "kind": "DECISION-VARIABLE",
+                "units": "CFS",
+            }
+        )
+        with tempfile.TemporaryDirectory(prefix="csdb") as TEMP:
+            client = Client(Path(TEMP) / "bench.db", fill_vars_if_new=False)
+            start = time.perf_counter()
+            client.put_variables_from_dataframe(df)
+            elapsed = time.perf_counter() - start
+            assert len(client.get_table_as_dataframe("variable")) == size
+        print(f"{size:>10,}{elapsed:>9.2f}s{size / elapsed:>12,.0f}/sec")
+
+
+if __name__ == "__main__":
+    main()
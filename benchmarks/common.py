@@ -0,0 +1,58 @@
+"""Shared helpers for the benchmark scripts in this directory.
+
+The benchmarks build synthetic CalSim-shaped databases so they can be run without
+access to real study files.
+"""
+
+import time
+from pathlib import Path
+from statistics import median
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from csdb import Client
+
+
+def make_run_frame(
+    code_names: list[str],
+    years: int = 100,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Build a tidy run DataFrame with monthly, end-of-month values."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("1921-10-31", periods=12 * years, freq="ME")
+    return pd.DataFrame(
+        {
+            "datetime": np.tile(dates, len(code_names)),
+            "variable": np.repeat(code_names, len(dates)),
+            "value": rng.random(len(dates) * len(code_names)).astype("float32"),
+        }
+    )
+
+
+def make_database(
+    dst: Path,
+    runs: int = 2,
+    years: int = 100,
+) -> tuple[Client, list[str], list[str]]:
+    """Create a database with the default variables and some synthetic runs."""
+    client = Client(dst)
+    code_names = client.get_table_as_dataframe("variable")["code_name"].tolist()
+    run_names = [f"RUN{i}" for i in range(runs)]
+    for i, run_name in enumerate(run_names):
+        df = make_run_frame(code_names, years=years, seed=i)
+        df["run"] = run_name
+        client.put_run_from_dataframe(run_name, df)
+    return client, run_names, code_names
+
+
+def timeit(func: Callable, repeat: int = 20) -> float:
+    """Return the median wall time of `func` in seconds."""
+    times = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return median(times)
@@ -33,25 +33,35 @@ def cli(args: list[str] | None = None):
         help="""The variables to initialize the database with if it needs to be created.
         """,
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="""The number of processes used to read DSS files (defaults to the number
+        of CPUs).
+        """,
+    )
 
     namepspace = parser.parse_args(args)
     src: Path = namepspace.src
     db: Path = namepspace.db
     vars: Path = namepspace.vars
+    workers: int | None = namepspace.workers
 
     files = sorted([f for f in src.iterdir() if f.suffix == ".dss"])
-    batch_upload_from_dss(db, files, vars)
+    batch_upload_from_dss(db, files, vars, max_workers=workers)
 
 
 def batch_upload_from_dss(
     database: Path,
     files: list[Path],
     vars: Path | bool = True,
+    max_workers: int | None = None,
 ):
     client = Client(database, fill_vars_if_new=vars)
-    for f in files:
-        logger.info(f"Uploading '{f.stem}': {f}")
-        client.put_run_from_dss(f.stem, f)
+    logger.info(f"Uploading {len(files)} files")
+    for run in client.put_runs_from_dss(files, max_workers=max_workers):
+        logger.info(f"Uploaded '{run.name}': {run.source}")
 
 
 if __name__ == "__main__":
@@ -1,2 +1,5 @@
+from .aio import AsyncClient
 from .client import Client
+from .federated import FederatedClient
+from .parquet import ParquetClient
 from .schemas import Run, Variable
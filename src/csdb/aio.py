@@ -0,0 +1,135 @@
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable
+
+from .client import Client
+
+logger = logging.getLogger(__name__)
+
+
+def _reader(name: str) -> Callable:
+    # A coroutine that runs the read method of `Client` on the thread pool
+    method = getattr(Client, name)
+
+    @functools.wraps(method)
+    async def wrapper(self: "AsyncClient", *args, **kwargs) -> Any:
+        return await self._run(method, *args, **kwargs)
+
+    return wrapper
+
+
+def _writer(name: str) -> Callable:
+    # A coroutine that runs the write method of `Client` on the thread pool, one
+    # write at a time
+    method = getattr(Client, name)
+
+    @functools.wraps(method)
+    async def wrapper(self: "AsyncClient", *args, **kwargs) -> Any:
+        async with self._write_lock:
+            return await self._run(method, *args, **kwargs)
+
+    return wrapper
+
+
+class AsyncClient:
+    """`csdb.AsyncClient` runs the methods of `csdb.Client` as coroutines.
+
+    Each method runs on a bounded pool of threads, so a query doesn't block the event
+    loop, and many queries can run at the same time. While the client is open, every
+    thread in the pool uses its own cursor on the shared connection, see
+    `Client.open`. Writes are run one at a time, reads run alongside them.
+
+    A client that wasn't opened with `open` or `async with` is opened, for reads and
+    writes, by the first method that runs, and stays open until `close`. The
+    threads never open their own connections: DuckDB can't open the same file with
+    a read-only and a read-write connection in one process at the same time.
+
+    The client must be used from a single event loop.
+
+    Parameters
+    ----------
+    src : Path | str
+        The path to the database file.
+    max_workers : int, optional
+        The number of threads that run queries, by default 4
+    **kwargs
+        Passed to `csdb.Client`
+
+    Example
+    -------
+        >>> import asyncio
+        >>> import csdb
+        >>> async def main():
+        ...     async with csdb.AsyncClient("file.db") as client:
+        ...         return await asyncio.gather(
+        ...             client.get_result_by_variable("S_OROVL"),
+        ...             client.get_result_by_variable("S_SHSTA"),
+        ...         )
+        >>> oroville, shasta = asyncio.run(main())
+    """
+
+    def __init__(self, src: Path | str, max_workers: int = 4, **kwargs):
+        self.client = Client(src, **kwargs)
+        self.max_workers = max_workers
+        self._write_lock = asyncio.Lock()
+        self.__executor: ThreadPoolExecutor | None = None
+
+    async def __aenter__(self) -> "AsyncClient":
+        return await self.open()
+
+    async def __aexit__(self, *args) -> None:
+        await self.close()
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the client is holding a persistent connection to the database."""
+        return self.client.is_open
+
+    async def open(self, read_only: bool = False) -> "AsyncClient":
+        """Open a persistent connection to the database, see `Client.open`."""
+        self.client.open(read_only=read_only)
+        return self
+
+    async def close(self) -> None:
+        """Wait for the running queries, and close the connection and thread pool."""
+        async with self._write_lock:
+            executor, self.__executor = self.__executor, None
+            if executor is not None:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, executor.shutdown)
+            self.client.close()
+
+    async def _run(self, method: Callable, *args, **kwargs) -> Any:
+        if not self.client.is_open:
+            logger.debug("opening the client on first use")
+            self.client.open()
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="csdb",
+            )
+        loop = asyncio.get_running_loop()
+        call = functools.partial(method, self.client, *args, **kwargs)
+        return await loop.run_in_executor(self.__executor, call)
+
+    get_variable = _reader("get_variable")
+    get_table_as_dataframe = _reader("get_table_as_dataframe")
+    get_variable_counts = _reader("get_variable_counts")
+    get_result_by_run = _reader("get_result_by_run")
+    get_result_by_variable = _reader("get_result_by_variable")
+    query = _reader("query")
+    aggregate = _reader("aggregate")
+    exceedance = _reader("exceedance")
+    compare_runs = _reader("compare_runs")
+
+    put_variable = _writer("put_variable")
+    put_variables_from_yaml = _writer("put_variables_from_yaml")
+    put_variables_from_csv = _writer("put_variables_from_csv")
+    put_variables_from_dataframe = _writer("put_variables_from_dataframe")
+    put_run_from_dataframe = _writer("put_run_from_dataframe")
+    put_run_from_dss = _writer("put_run_from_dss")
+    put_runs_from_dss = _writer("put_runs_from_dss")
+    delete_run = _writer("delete_run")
@@ -0,0 +1,199 @@
+import functools
+import inspect
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable, NamedTuple
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+_MISSING = object()
+
+
+class CacheStats(NamedTuple):
+    """The counters of a `ResultCache`."""
+
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    size: int
+    """The estimated memory, in bytes, of the cached results"""
+    generation: int
+    """The number of times the cache has been invalidated by a write"""
+
+
+def _sizeof(value: Any) -> int:
+    # An estimate of the memory held by a result, only the large parts are counted
+    # exactly, everything else is counted shallowly.
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value.values())
+    if hasattr(value, "nbytes"):  # pyarrow.Table
+        return int(value.nbytes)
+    if hasattr(value, "estimated_size"):  # polars.DataFrame
+        return int(value.estimated_size())
+    return sys.getsizeof(value)
+
+
+def _copy(value: Any) -> Any:
+    # Results are copied in and out of the cache, so that changing a result that
+    # was returned doesn't change what the cache returns next time. Arrow tables
+    # are immutable, and are shared.
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return value.copy()
+    if hasattr(value, "clone"):  # polars.DataFrame
+        return value.clone()
+    if isinstance(value, BaseModel):
+        return value.model_copy()
+    if isinstance(value, tuple):
+        return tuple(_copy(v) for v in value)
+    if isinstance(value, list):
+        return [_copy(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    return value
+
+
+def _materialize(value: Any) -> Any:
+    # Iterables are read once into lists, so that a generator of names can be both
+    # part of the key and passed to the method
+    if isinstance(value, (str, bytes)) or not isinstance(value, Iterable):
+        return value
+    return list(value)
+
+
+def _freeze(value: Any) -> Hashable:
+    # A hashable key for an argument, lists of names become tuples
+    if isinstance(value, (str, bytes)) or value is None:
+        return value
+    if isinstance(value, Iterable):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class ResultCache:
+    """A least-recently-used cache of query results, bounded by memory.
+
+    Writes to the database invalidate the whole cache by advancing its write
+    generation. A result read before a write finishes isn't stored, so the cache
+    never returns data older than the last write made through the same client.
+    Writes made by other processes aren't seen by the cache.
+
+    Parameters
+    ----------
+    max_size : int
+        The estimated memory, in bytes, that the cached results may use. The least
+        recently used results are evicted to stay under this limit, and results
+        larger than it aren't cached.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.__entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__size = 0
+        self.__generation = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    @property
+    def generation(self) -> int:
+        """The current write generation."""
+        return self.__generation
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a copy of a cached result, or `default` if it isn't cached."""
+        with self.__lock:
+            entry = self.__entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.__misses += 1
+                return default
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+        return _copy(entry[0])
+
+    def put(self, key: Hashable, value: Any, generation: int):
+        """Cache a result that was read during the write `generation`."""
+        size = _sizeof(value)
+        if size > self.max_size:
+            logger.debug(f"not caching {key}, {size=} is larger than the cache")
+            return
+        value = _copy(value)
+        with self.__lock:
+            if generation != self.__generation:
+                return  # a write happened while the result was being read
+            if key in self.__entries:
+                self.__size -= self.__entries.pop(key)[1]
+            self.__entries[key] = (value, size)
+            self.__size += size
+            while self.__size > self.max_size:
+                _, (_, evicted) = self.__entries.popitem(last=False)
+                self.__size -= evicted
+                self.__evictions += 1
+
+    def invalidate(self):
+        """Drop every cached result and advance the write generation."""
+        with self.__lock:
+            self.__generation += 1
+            self.__entries.clear()
+            self.__size = 0
+
+    def stats(self) -> CacheStats:
+        """Get the hit, miss and eviction counts, and the size of the cache."""
+        with self.__lock:
+            return CacheStats(
+                hits=self.__hits,
+                misses=self.__misses,
+                evictions=self.__evictions,
+                entries=len(self.__entries),
+                size=self.__size,
+                generation=self.__generation,
+            )
+
+
+def cached(method: Callable) -> Callable:
+    """Cache the results of a `Client` read method in the client's `ResultCache`.
+
+    The arguments are bound to the signature of the method, so that the same call
+    made positionally or with keywords shares a cache entry. Iterable arguments,
+    like a generator of run names, are read into lists once, and the lists are
+    passed to the method.
+    """
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        cache = self.cache
+        if cache is None:
+            return method(self, *args, **kwargs)
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        for name, argument in list(bound.arguments.items())[1:]:  # skip self
+            bound.arguments[name] = _materialize(argument)
+        arguments = list(bound.arguments.items())[1:]
+        key = (method.__name__, *((k, _freeze(v)) for k, v in arguments))
+        value = cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        generation = cache.generation
+        value = method(*bound.args, **bound.kwargs)
+        cache.put(key, value, generation)
+        return value
+
+    return wrapper
@@ -1,13 +1,28 @@
+import contextlib
+import hashlib
 import logging
+import struct
 import tempfile
+import threading
+import weakref
+from collections import OrderedDict
 from csv import QUOTE_NONNUMERIC
+from datetime import date
 from pathlib import Path
-from typing import Literal
+from typing import TYPE_CHECKING, Iterable, Iterator, Literal, Mapping, Union, get_args
 
 import duckdb
+import hecdss
+import numpy as np
 import pandas as pd
+from hecdss.record_type import RecordType
 
 from . import io, schemas
+from .cache import ResultCache, cached
+
+if TYPE_CHECKING:
+    import polars
+    import pyarrow
 
 logger = logging.getLogger(__name__)
 EXPECTED_RESULT_DF_COLUMNS = [
@@ -18,7 +33,78 @@ EXPECTED_RESULT_DF_COLUMNS = [
 ]
 
 SCHEMA_DIR = Path(__file__).parent / "default" / "sql" / "schema"
+# The files in a profile's directory replace the default schema files of the same name
+SCHEMA_PROFILES = {
+    "default": None,
+    "archive": SCHEMA_DIR.parent / "schema_archive",
+    "dense": SCHEMA_DIR.parent / "schema_dense",
+    "dedup": SCHEMA_DIR.parent / "schema_dedup",
+}
+SchemaProfile = Literal["default", "archive", "dense", "dedup"]
 DEFAULT_VARIABLES_YAML = Path(__file__).parent / "default" / "variables.yaml"
+MAX_CACHED_STATEMENTS = 256
+SIDECAR_TABLES = {
+    "run_source": "003_create_run_source.sql",
+    "dss_catalog": "004_create_dss_catalog.sql",
+}
+
+# The SQL for the period each result belongs to, CalSim stores monthly values at the
+# end of the month, and the water year starts in October.
+AGGREGATE_PERIODS = {
+    "water_year": "year(datetime) + CASE WHEN month(datetime) >= 10 THEN 1 ELSE 0 END",
+    "calendar_year": "year(datetime)",
+    "month": "month(datetime)",
+    "period_of_record": None,
+}
+AGGREGATE_FUNCTIONS = {
+    "sum": "sum",
+    "mean": "avg",
+    "min": "min",
+    "max": "max",
+    "median": "median",
+    "count": "count",
+    "std": "stddev_samp",
+}
+
+OutputFormat = Literal["pandas", "arrow", "polars", "numpy"]
+OUTPUT_FORMATS = get_args(OutputFormat)
+OutputData = Union[
+    pd.DataFrame, "pyarrow.Table", "polars.DataFrame", dict[str, np.ndarray]
+]
+
+# The layout of a dataset written by `Client.export_parquet`
+PARQUET_TABLES = ("run", "variable")
+PARQUET_RESULT_DIR = "result"
+PARQUET_PARTITIONS = ("run", "variable_kind")
+
+
+def _quote_literal(value: str) -> str:
+    # For the few places a value can't be a parameter, like a PIVOT IN list
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _digest_code_names(code_names: Iterable[str]) -> str:
+    # Identifies the set of variables a DSS file was searched for when it was added
+    return hashlib.blake2b("\n".join(sorted(code_names)).encode()).hexdigest()
+
+
+def _digest_series(
+    variable_id: int,
+    start: date,
+    step: tuple[int, ...],
+    values: list[float | None],
+) -> str:
+    # Identifies a series in the payload table of a "dedup" database. It's computed
+    # from a fixed binary encoding, so it doesn't change with the version of duckdb:
+    # the variable, the first date, the parts of the step, which values are missing,
+    # and the values as little-endian float32.
+    array = np.array([np.nan if v is None else v for v in values], dtype="<f4")
+    h = hashlib.blake2b()
+    h.update(struct.pack("<qq", variable_id, start.toordinal()))
+    h.update(struct.pack(f"<{len(step)}q", *step))
+    h.update(np.isnan(array).tobytes())
+    h.update(array.tobytes())
+    return h.hexdigest()
 
 
 class Client:
@@ -28,6 +114,13 @@ class Client:
     to read, add, and remove data from the duckdb database on disk. The methods are
     simply convieniences in interacting with this database.
 
+    The read methods return a `pandas.DataFrame` by default. With their `output`
+    argument they can instead return a `pyarrow.Table` ("arrow"), a
+    `polars.DataFrame` ("polars"), or a `dict` of `numpy` arrays ("numpy"), which
+    need those packages to be installed. These formats have no index, so a wide
+    table keeps its dates in a `datetime` column, and a run or variable named
+    "datetime" can't be read into them.
+
     Parameters
     ----------
     src : Path | str
@@ -40,6 +133,20 @@ class Client:
     schema_directory : Path | None, optional
         The path to the directory that contains the SQL schema definition files if
         you want to extend the default schema, by default None
+    schema_profile : Literal["default", "archive", "dense", "dedup"], optional
+        The layout to create a new database with, by default "default". The
+        "archive" profile is meant for append-only archives: the result table has
+        no unique index or foreign keys, which keeps the file smaller and ingest
+        fast as it grows. Instead, every write to an archive is validated as a
+        whole batch, see `put_run_from_dataframe(method="bulk")`. The "dense"
+        profile stores each monthly timeseries as one row of a `series` table,
+        and `result` is a view of it with the same columns. The "dedup" profile
+        is the dense layout, but a series that is identical in many runs is only
+        stored once, and shared by them.
+    cache_size : int | None, optional
+        If given, the results of the read methods are kept in an in-memory cache of
+        up to this many bytes, and re-used when the same call is made again. Writes
+        made through the client clear the cache, by default None (no cache)
 
     Example
     -------
@@ -59,10 +166,21 @@ class Client:
         >>> import csdb
         >>> client = csdb.Client(src="file.db", fill_vars_if_new="variables.yaml")
 
+    By default, every method opens and closes its own connection to the database. Use
+    the client as a context manager (or call `open` and `close`) to keep a single
+    connection, and its buffer cache, alive across many calls.
+
+        >>> import csdb
+        >>> with csdb.Client("file.db") as client:
+        ...     for code_name in ("S_OROVL", "S_SHSTA"):
+        ...         runs, variable, df = client.get_result_by_variable(code_name)
+
     Raises
     ------
     IOError
         Raised if `fill_vars_if_new` cannot be interpreted for the variable table
+    ValueError
+        Raised if `schema_profile` isn't one of the known profiles
     """
 
     def __init__(
@@ -70,6 +188,8 @@ class Client:
         src: Path | str,
         fill_vars_if_new: bool | Path = True,
         schema_directory: Path | None = None,
+        schema_profile: SchemaProfile = "default",
+        cache_size: int | None = None,
     ):
         src = Path(src)
         # resolve default mutable arguments
@@ -80,15 +200,33 @@ class Client:
             variables_src_file = DEFAULT_VARIABLES_YAML
         if schema_directory is None:
             schema_directory = SCHEMA_DIR
+        if schema_profile not in SCHEMA_PROFILES:
+            raise ValueError(
+                f"expected one of {tuple(SCHEMA_PROFILES)}, got {schema_profile=}"
+            )
+        schema_files = {f.name: f for f in schema_directory.iterdir()}
+        if SCHEMA_PROFILES[schema_profile] is not None:
+            schema_files.update(
+                {f.name: f for f in SCHEMA_PROFILES[schema_profile].iterdir()}
+            )
         # Set attributes on the client
         if not src.is_absolute():
             src = Path(".").resolve() / src
         self.__src: Path = src
+        # Connection state used when the client is held open, see `Client.open`
+        self.__conn: duckdb.DuckDBPyConnection | None = None
+        # The cursor of each thread, a thread's cursor is dropped when the thread is
+        self.__cursors: weakref.WeakKeyDictionary[
+            threading.Thread, duckdb.DuckDBPyConnection
+        ] = weakref.WeakKeyDictionary()
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+        self.__cache = ResultCache(cache_size) if cache_size else None
         # Create, initialize, and possibly fill the database if it doesn't exist.
         if not self.__src.exists():
             logger.debug(f"creating new database file: {self.__src}")
             with duckdb.connect(self.__src, read_only=False) as conn:
-                for f in schema_directory.iterdir():
+                for _, f in sorted(schema_files.items()):
                     if f.suffix != ".sql":
                         continue
                     conn.sql(f.read_text())
@@ -107,6 +245,129 @@ class Client:
                 method = var_parse_methods[variables_src_file.suffix]
                 method(variables_src_file)
 
+    def __enter__(self) -> "Client":
+        return self.open()
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def cache(self) -> ResultCache | None:
+        """The cache of read results, if the client was made with a `cache_size`."""
+        return self.__cache
+
+    @property
+    def is_open(self) -> bool:
+        """Whether the client is holding a persistent connection to the database."""
+        return self.__conn is not None
+
+    def open(self, read_only: bool = False) -> "Client":
+        """Open a persistent connection to the database.
+
+        While the client is open, every method re-uses this connection instead of
+        opening a new one, so the catalog and buffer cache stay warm between calls.
+        Each thread that uses the client gets its own cursor on the shared connection.
+        Calling `open` on a client that is already open does nothing.
+
+        Parameters
+        ----------
+        read_only : bool, optional
+            Open the database in read-only mode, this allows other processes to read
+            the database at the same time, by default False
+
+        Returns
+        -------
+        Client
+            The client itself, so that `open` can be chained
+
+        Example
+        -------
+            >>> import csdb
+            >>> client = csdb.Client("file.db").open(read_only=True)
+            >>> run, variables, df = client.get_result_by_run("RUN1")
+            >>> client.close()
+        """
+        with self.__lock:
+            if self.__conn is None:
+                logger.debug(f"opening persistent connection: {self.__src}")
+                self.__conn = self._new_connection(read_only)
+        return self
+
+    def close(self) -> None:
+        """Close the persistent connection opened by `Client.open`.
+
+        Any cursors created for threads using the client are closed as well. Calling
+        `close` on a client that isn't open does nothing.
+        """
+        with self.__lock:
+            if self.__conn is None:
+                return
+            logger.debug(f"closing persistent connection: {self.__src}")
+            for cursor in list(self.__cursors.values()):
+                cursor.close()
+            self.__conn.close()
+            self.__conn = None
+            self.__cursors = weakref.WeakKeyDictionary()
+            self.__local = threading.local()
+
+    def _cursor(self) -> duckdb.DuckDBPyConnection:
+        # Each thread gets its own cursor, duckdb connections aren't thread-safe
+        cursor = getattr(self.__local, "cursor", None)
+        if cursor is None:
+            with self.__lock:
+                if self.__conn is None:
+                    raise duckdb.ConnectionException("the client is not open")
+                cursor = self.__conn.cursor()
+                self.__cursors[threading.current_thread()] = cursor
+            self.__local.cursor = cursor
+            self.__local.statements = OrderedDict()
+        return cursor
+
+    def _execute(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        query: str,
+        params: list | None = None,
+    ) -> duckdb.DuckDBPyConnection:
+        # Values are always bound as parameters, never formatted into the SQL. On the
+        # cursors of an open client each query is parsed once, and the statement is
+        # re-used by later calls on the same cursor.
+        if conn is not getattr(self.__local, "cursor", None):
+            return conn.execute(query, params)
+        statements: OrderedDict = self.__local.statements
+        statement = statements.get(query)
+        if statement is None:
+            (statement,) = conn.extract_statements(query)
+            statements[query] = statement
+            if len(statements) > MAX_CACHED_STATEMENTS:
+                statements.popitem(last=False)
+        else:
+            statements.move_to_end(query)
+        return conn.execute(statement, params)
+
+    def _new_connection(self, read_only: bool) -> duckdb.DuckDBPyConnection:
+        # Every connection to the database is made here
+        return duckdb.connect(self.__src, read_only=read_only)
+
+    @contextlib.contextmanager
+    def _connect(self, read_only: bool = True) -> Iterator[duckdb.DuckDBPyConnection]:
+        # Re-use the persistent connection if the client is open, otherwise open a new
+        # connection for the duration of the context.
+        # Writes clear the cache before they start, so reads that finish during the
+        # write aren't cached, and after they finish.
+        writing = (not read_only) and (self.__cache is not None)
+        if writing:
+            self.__cache.invalidate()
+        try:
+            if self.__conn is not None:
+                yield self._cursor()
+            else:
+                with self._new_connection(read_only) as conn:
+                    yield conn
+        finally:
+            if writing:
+                self.__cache.invalidate()
+
     def put_variables_from_yaml(self, src: Path):
         """Put variables into the databse that are descibed in a yaml file.
 
@@ -149,18 +410,8 @@ class Client:
         """
         logger.info(f"adding variables from yaml={src}")
         obj: dict = io.load_yaml(src)
-        str_dss_path = list()
-        s = "(nextval('seq_variable'), '{name}', '{code_name}', '{kind}', '{units}')"
-        added = list()
-        for k, v in obj.items():
-            str_dss_path.append(s.format(**v))
-            added.append(k)
-        with duckdb.connect(self.__src, read_only=False) as conn:
-            q = f"""INSERT INTO variable
-                    VALUES {', '.join(str_dss_path)}
-                    ON CONFLICT DO NOTHING;"""
-            conn.sql(q)
-        logger.debug(f"added the following entries: {', '.join(added)}")
+        df = pd.DataFrame.from_records(list(obj.values()))
+        self.put_variables_from_dataframe(df)
 
     def put_variables_from_dataframe(self, df: pd.DataFrame):
         """Put variables into the databse that are descibed in a DataFrame.
@@ -192,20 +443,27 @@ class Client:
             >>> df = pd.DataFrame(...)
             >>> client.put_variables_from_dataframe(df)
         """
-        df.columns = [c.lower() for c in df.columns]
+        df = df.rename(columns=str.lower)
         logger.info(f"adding {len(df)} variables from dataframe")
-        str_dss_path = list()
-        s = "(nextval('seq_variable'), '{name}', '{code_name}', '{kind}', '{units}')"
-        added = list()
-        for _, row in df.iterrows():
-            str_dss_path.append(s.format(**row.to_dict()))
-            added.append(row["name"])
-        with duckdb.connect(self.__src, read_only=False) as conn:
-            q = f"""INSERT INTO variable
-                    VALUES {', '.join(str_dss_path)}
-                    ON CONFLICT DO NOTHING;"""
-            conn.sql(q)
-        logger.debug(f"added the following entries: {', '.join(added)}")
+        df = df.loc[:, ["name", "code_name", "kind", "units"]].drop_duplicates(
+            subset="code_name"
+        )
+        with self._connect(read_only=False) as conn:
+            # duckdb reads the DataFrame in place, new variables are added in one pass
+            conn.register("_csdb_variable_frame", df)
+            try:
+                added = self._execute(
+                    conn,
+                    """INSERT INTO variable
+                    SELECT nextval('seq_variable'), f.name, f.code_name, f.kind, f.units
+                    FROM _csdb_variable_frame AS f
+                    ANTI JOIN variable ON f.code_name = variable.code_name
+                    ON CONFLICT DO NOTHING
+                    RETURNING code_name;""",
+                ).fetchall()
+            finally:
+                conn.unregister("_csdb_variable_frame")
+        logger.debug(f"added {len(added)} new variables")
 
     def put_variables_from_csv(self, src: Path):
         """Put variables into the databse that are descibed in a csv.
@@ -266,13 +524,16 @@ class Client:
                 units="OLYMPICSWIMMINGPOOLS"
             )
         """
-        with duckdb.connect(self.__src, read_only=False) as conn:
-            data = f"'{name}', '{code_name}', '{kind}', '{units}'"
-            q = f"""INSERT INTO variable
-                    VALUES (nextval('seq_variable'), {data})
-                    ON CONFLICT DO NOTHING;"""
-            conn.sql(q)
+        with self._connect(read_only=False) as conn:
+            self._execute(
+                conn,
+                """INSERT INTO variable
+                VALUES (nextval('seq_variable'), ?, ?, ?, ?)
+                ON CONFLICT DO NOTHING;""",
+                [name, code_name, kind, units],
+            )
 
+    @cached
     def get_variable(self, code_name: str) -> schemas.Variable:
         """Get a variable from the database.
 
@@ -298,34 +559,33 @@ class Client:
         ValueError
             Raised when the variable cannot be found,
         """
-        query = (
-            "SELECT name, code_name, kind, units FROM variable"
-            + f" WHERE code_name = '{code_name}'"
-        )
-        with duckdb.connect(self.__src, read_only=True) as conn:
-            tbl = conn.sql(query)
-            df = tbl.to_df()
-            if len(df) != 1:
-                logger.error(tbl)
-                raise ValueError(
-                    f"Query didn't return len(df) == 1 for {code_name=}\n{df}"
-                )
-        return schemas.Variable.model_validate(df.loc[0, :].to_dict())
-
+        query = "SELECT name, code_name, kind, units FROM variable WHERE code_name = ?;"
+        with self._connect(read_only=True) as conn:
+            rows = self._execute(conn, query, [code_name]).fetchall()
+        if len(rows) != 1:
+            logger.error(rows)
+            raise ValueError(f"Query didn't return 1 row for {code_name=}\n{rows}")
+        name, code_name, kind, units = rows[0]
+        return schemas.Variable(name=name, code_name=code_name, kind=kind, units=units)
+
+    @cached
     def get_table_as_dataframe(
         self,
         table_name: Literal["run", "variable", "result"],
-    ) -> pd.DataFrame:
+        output: OutputFormat = "pandas",
+    ) -> OutputData:
         """Return a DataFrame copy of a database table.
 
         Parameters
         ----------
         table_name : Literal[&quot;run&quot;, &quot;variable&quot;, &quot;result&quot;]
             The name of the table within the database
+        output : OutputFormat, optional
+            The format to return the data in, see `csdb.Client`, by default "pandas"
 
         Returns
         -------
-        pd.DataFrame
+        OutputData
             A copy of the table as a DataFrame. Modifications to this table will not
             impact the database
 
@@ -347,10 +607,10 @@ class Client:
         viewable = ("run", "variable", "result")
         if table_name not in viewable:
             raise ValueError(f"expected one of {viewable}, got {table_name=}")
-        with duckdb.connect(self.__src, read_only=True) as conn:
-            df = conn.sql(f"SELECT * FROM {table_name};").to_df()
-        return df
+        with self._connect(read_only=True) as conn:
+            return self._fetch(conn, f"SELECT * FROM {table_name};", output=output)
 
+    @cached
     def get_variable_counts(self) -> pd.Series:
         """Get the number of variables present in each run in the database.
 
@@ -369,16 +629,17 @@ class Client:
             RUN1        42
             RUN2        256
         """
-        with duckdb.connect(self.__src, read_only=True) as conn:
+        with self._connect(read_only=True) as conn:
             s = (
-                conn.execute(
+                self._execute(
+                    conn,
                     """SELECT run.name AS run_name,
                     COUNT(DISTINCT variable.code_name) AS code_name_count
                 FROM result
                 JOIN run ON result.run_id = run.id
                 JOIN variable ON result.variable_id = variable.id
                 GROUP BY run.name
-                ORDER BY run.name;"""
+                ORDER BY run.name;""",
                 )
                 .df()
                 .set_index("run_name")
@@ -389,32 +650,620 @@ class Client:
 
     def _put_run(self, name: str, source: str | Path, ignore_conflict: bool = True):
         source = str(source)
-        with duckdb.connect(self.__src, read_only=False) as conn:
+        with self._connect(read_only=False) as conn:
             if ignore_conflict:
-                q = f"""INSERT INTO run
-                        VALUES (nextval('seq_run'), '{name}', '{source}')
+                q = """INSERT INTO run
+                        VALUES (nextval('seq_run'), ?, ?)
                         ON CONFLICT DO NOTHING;"""
             else:
-                q = f"""INSERT INTO run
-                        VALUES (nextval('seq_run'), '{name}', '{source}');"""
-            conn.sql(q)
+                q = """INSERT INTO run
+                        VALUES (nextval('seq_run'), ?, ?);"""
+            self._execute(conn, q, [name, source])
 
     def _get_run(self, run_name: str) -> schemas.Run:
-        with duckdb.connect(self.__src, read_only=True) as conn:
-            tbl = conn.sql(
-                f"SELECT name, source FROM run WHERE run.name = '{run_name}';"
+        with self._connect(read_only=True) as conn:
+            rows = self._execute(
+                conn,
+                "SELECT name, source FROM run WHERE run.name = ?;",
+                [run_name],
+            ).fetchall()
+        if len(rows) != 1:
+            logger.error(rows)
+            raise ValueError(f"Query didn't return 1 row for {run_name=}\n{rows}")
+        name, source = rows[0]
+        return schemas.Run(name=name, source=source)
+
+    def _get_runs(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        run_names: Iterable[str],
+    ) -> list[schemas.Run]:
+        # one round trip for every run, the objects come back in the order requested
+        run_names = list(run_names)
+        rows = self._execute(
+            conn,
+            "SELECT name, source FROM run WHERE list_contains(?, run.name);",
+            [run_names],
+        ).fetchall()
+        records = {name: source for name, source in rows}
+        missing = [n for n in run_names if n not in records]
+        if missing:
+            raise ValueError(f"runs not found in the database: {missing}")
+        return [schemas.Run(name=n, source=records[n]) for n in run_names]
+
+    def _get_variables(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        code_names: Iterable[str],
+    ) -> list[schemas.Variable]:
+        # one round trip for every variable, the objects come back in the order
+        # requested
+        code_names = list(code_names)
+        rows = self._execute(
+            conn,
+            "SELECT name, code_name, kind, units FROM variable "
+            + "WHERE list_contains(?, variable.code_name);",
+            [code_names],
+        ).fetchall()
+        records = {row[1]: row for row in rows}
+        missing = [c for c in code_names if c not in records]
+        if missing:
+            raise ValueError(f"variables not found in the database: {missing}")
+        return [
+            schemas.Variable(name=name, code_name=code_name, kind=kind, units=units)
+            for name, code_name, kind, units in (records[c] for c in code_names)
+        ]
+
+    def _insert_run(self, conn: duckdb.DuckDBPyConnection, name: str, src: str) -> int:
+        self._execute(
+            conn,
+            "INSERT OR IGNORE INTO run (id, name, source) "
+            + "VALUES (nextval('seq_run'), ?, ?) "
+            + "RETURNING id",
+            [name, src],
+        )
+        added = self._execute(
+            conn, "SELECT id FROM run WHERE run.name = ?", [name]
+        ).fetchone()
+        if added is None:
+            raise duckdb.DataError(f"Couldn't find {name=}")
+        return added[0]
+
+    def _get_schema_profile(self, conn: duckdb.DuckDBPyConnection) -> SchemaProfile:
+        # Dense databases store their results in the series table, deduplicated ones
+        # also have a payload table, and archives are the databases whose result
+        # table has no unique index
+        payload, series, unique = self._execute(
+            conn,
+            """SELECT
+                (
+                    SELECT count(*) FROM duckdb_tables()
+                    WHERE table_name = 'payload'
+                ),
+                (
+                    SELECT count(*) FROM duckdb_tables()
+                    WHERE table_name = 'series'
+                ),
+                (
+                    SELECT count(*) FROM duckdb_constraints()
+                    WHERE table_name = 'result' AND constraint_type = 'UNIQUE'
+                );""",
+        ).fetchone()
+        if payload:
+            return "dedup"
+        if series:
+            return "dense"
+        return "default" if unique else "archive"
+
+    def _delete_results(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        condition: str,
+        params: list,
+    ):
+        # Delete from the table the results are stored in, both have run_id and
+        # variable_id, and drop the shared series no run uses anymore
+        profile = self._get_schema_profile(conn)
+        table = "series" if profile in ("dense", "dedup") else "result"
+        self._execute(conn, f"DELETE FROM {table} WHERE {condition};", params)
+        if profile == "dedup":
+            self._execute(
+                conn,
+                """DELETE FROM payload
+                WHERE id NOT IN (SELECT payload_id FROM series);""",
+            )
+
+    def _insert_result(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        run_id: int,
+        df: pd.DataFrame,
+        method: Literal["frame", "csv", "bulk"] = "frame",
+    ):
+        if method not in ("frame", "csv", "bulk"):
+            raise ValueError(f"expected one of ('frame', 'csv', 'bulk'), got {method=}")
+        profile = self._get_schema_profile(conn)
+        if profile in ("dense", "dedup"):
+            self._insert_result_dense(conn, run_id, df, dedup=profile == "dedup")
+            return
+        if method != "bulk" and profile == "archive":
+            # nothing else checks the results written to an archive
+            logger.debug(f"validating results in bulk for archive, not {method=}")
+            method = "bulk"
+        if method == "frame":
+            self._insert_result_from_frame(conn, run_id, df)
+        elif method == "csv":
+            self._insert_result_from_csv(conn, run_id, df)
+        else:
+            self._insert_result_in_bulk(conn, run_id, df)
+
+    def _insert_result_from_frame(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        run_id: int,
+        df: pd.DataFrame,
+    ):
+        # duckdb scans the registered DataFrame in place, the variable ids are resolved
+        # with a join and the types are cast inside the engine.
+        conn.register("_csdb_result_frame", df)
+        try:
+            missing = self._execute(
+                conn,
+                """SELECT DISTINCT f.variable
+                FROM _csdb_result_frame AS f
+                ANTI JOIN variable ON f.variable = variable.code_name;""",
+            ).fetchall()
+            if missing:
+                missing = {row[0] for row in missing}
+                raise ValueError(f"Variables not found in DB: {missing}")
+            logger.debug(f"inserting {len(df)} rows into result from DataFrame")
+            self._execute(
+                conn,
+                """INSERT INTO result (datetime, value, run_id, variable_id)
+                SELECT
+                    CAST(f.datetime AS DATE),
+                    CAST(f.value AS FLOAT),
+                    ?,
+                    variable.id,
+                FROM _csdb_result_frame AS f
+                JOIN variable ON f.variable = variable.code_name
+                ORDER BY variable.id, f.datetime;""",
+                [run_id],
+            )
+        finally:
+            conn.unregister("_csdb_result_frame")
+
+    def _stage_result(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        run_id: int,
+        df: pd.DataFrame,
+    ):
+        # Copy the rows into a temporary table without constraints, with their
+        # variable ids resolved (missing variables have a NULL id)
+        conn.register("_csdb_result_frame", df)
+        try:
+            self._execute(
+                conn,
+                """CREATE OR REPLACE TEMP TABLE _csdb_result_staging AS
+                SELECT
+                    CAST(f.datetime AS DATE) AS datetime,
+                    CAST(f.value AS FLOAT) AS value,
+                    CAST(? AS INTEGER) AS run_id,
+                    variable.id AS variable_id,
+                    f.variable AS code_name,
+                FROM _csdb_result_frame AS f
+                LEFT JOIN variable ON f.variable = variable.code_name;""",
+                [run_id],
+            )
+        finally:
+            conn.unregister("_csdb_result_frame")
+
+    def _validate_staged_result(self, conn: duckdb.DuckDBPyConnection, run_id: int):
+        # Check the whole staged batch at once for unknown variables, missing
+        # values, duplicate dates, and dates the run already has
+        missing, empty, duplicated, existing = self._execute(
+            conn,
+            """SELECT
+                list(DISTINCT s.code_name) FILTER (s.variable_id IS NULL),
+                list(DISTINCT s.code_name) FILTER (s.empty > 0),
+                list(DISTINCT s.code_name) FILTER (s.rows > 1),
+                list(DISTINCT s.code_name) FILTER (r.variable_id IS NOT NULL),
+            FROM (
+                SELECT
+                    code_name,
+                    variable_id,
+                    datetime,
+                    count(*) AS rows,
+                    count(*) FILTER (
+                        datetime IS NULL OR value IS NULL OR isnan(value)
+                    ) AS empty,
+                FROM _csdb_result_staging
+                GROUP BY code_name, variable_id, datetime
+            ) AS s
+            LEFT JOIN (
+                SELECT DISTINCT variable_id, datetime FROM result WHERE run_id = ?
+            ) AS r
+                ON s.variable_id = r.variable_id AND s.datetime = r.datetime;""",
+            [run_id],
+        ).fetchone()
+        if missing:
+            raise ValueError(f"Variables not found in DB: {set(missing)}")
+        if empty:
+            raise duckdb.ConstraintException(
+                f"missing (NULL or NaN) dates or values in the results for: {empty}"
+            )
+        if duplicated:
+            raise duckdb.ConstraintException(
+                f"duplicate dates in the results for variables: {duplicated}"
+            )
+        if existing:
+            raise duckdb.ConstraintException(
+                f"the run already has results on these dates for: {existing}"
+            )
+
+    def _insert_result_in_bulk(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        run_id: int,
+        df: pd.DataFrame,
+    ):
+        # The rows are staged in a temporary table without constraints, the whole
+        # batch is validated in one query, and then merged into result in one insert.
+        self._stage_result(conn, run_id, df)
+        try:
+            self._validate_staged_result(conn, run_id)
+            logger.debug(f"merging {len(df)} staged rows into result")
+            self._execute(
+                conn,
+                """INSERT INTO result (datetime, value, run_id, variable_id)
+                SELECT datetime, value, run_id, variable_id
+                FROM _csdb_result_staging
+                ORDER BY variable_id, datetime;""",
+            )
+        finally:
+            self._execute(conn, "DROP TABLE IF EXISTS _csdb_result_staging;")
+
+    def _insert_result_dense(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        run_id: int,
+        df: pd.DataFrame,
+        dedup: bool = False,
+    ):
+        # Each variable is stored as one series: the first date, a monthly step, and
+        # an array of values with NULL for any month that is missing. Results added to
+        # a series that already exists are merged with it, and the series rewritten.
+        # When `dedup`, the series are stored in the payload table by their digest,
+        # and a series that is already stored is only referenced.
+        self._stage_result(conn, run_id, df)
+        try:
+            self._validate_staged_result(conn, run_id)
+            (irregular,) = self._execute(
+                conn,
+                """SELECT list(DISTINCT code_name)
+                FROM _csdb_result_staging
+                WHERE datetime != last_day(datetime)
+                OR datetime NOT BETWEEN DATE '1700-01-31' AND DATE '2399-12-31';""",
+            ).fetchone()
+            if irregular:
+                raise ValueError(
+                    "the dense layout only stores monthly, end-of-month results "
+                    + f"from 1700 to 2399, got other dates for: {irregular}"
+                )
+            self._execute(
+                conn,
+                """INSERT INTO _csdb_result_staging
+                SELECT result.datetime, result.value, result.run_id, result.variable_id,
+                    NULL,
+                FROM result
+                WHERE result.run_id = ?
+                AND result.variable_id IN (
+                    SELECT DISTINCT variable_id FROM _csdb_result_staging
+                );""",
+                [run_id],
+            )
+            self._delete_results(
+                conn,
+                """run_id = ?
+                AND variable_id IN (
+                    SELECT DISTINCT variable_id FROM _csdb_result_staging
+                )""",
+                [run_id],
+            )
+            logger.debug(f"merging {len(df)} staged rows into series")
+            self._execute(
+                conn,
+                """CREATE OR REPLACE TEMP TABLE _csdb_series_staging AS
+                WITH months AS (
+                    SELECT
+                        variable_id,
+                        min(datetime) AS start,
+                        unnest(range(datediff('month', min(datetime), max(datetime)) + 1))
+                            AS i,
+                    FROM _csdb_result_staging
+                    GROUP BY variable_id
+                )
+                SELECT
+                    CAST(? AS INTEGER) AS run_id,
+                    months.variable_id,
+                    months.start,
+                    INTERVAL 1 MONTH AS step,
+                    list(s.value ORDER BY months.i) AS value,
+                FROM months
+                LEFT JOIN _csdb_result_staging AS s
+                    ON s.variable_id = months.variable_id
+                    AND s.datetime = last_day(months.start + months.i * INTERVAL 1 MONTH)
+                GROUP BY months.variable_id, months.start
+                ORDER BY months.variable_id;""",
+                [run_id],
+            )
+            if dedup:
+                self._insert_payloads(conn)
+            else:
+                self._execute(
+                    conn,
+                    """INSERT INTO series (run_id, variable_id, start, step, value)
+                    SELECT run_id, variable_id, start, step, value
+                    FROM _csdb_series_staging;""",
+                )
+        finally:
+            self._execute(conn, "DROP TABLE IF EXISTS _csdb_result_staging;")
+            self._execute(conn, "DROP TABLE IF EXISTS _csdb_series_staging;")
+
+    def _insert_payloads(self, conn: duckdb.DuckDBPyConnection):
+        # The staged series are looked up by their digest, and the series are
+        # compared too, so that two series with the same digest are never confused.
+        # Only the series that aren't stored yet are added to the payload table.
+        rows = self._execute(
+            conn,
+            """SELECT
+                variable_id,
+                start,
+                12 * year(step) + month(step),
+                day(step),
+                60 * hour(step) + minute(step),
+                microsecond(step),
+                value,
+            FROM _csdb_series_staging;""",
+        ).fetchall()
+        digests = pd.DataFrame(
+            {
+                "variable_id": [row[0] for row in rows],
+                "digest": [
+                    _digest_series(variable_id, start, step, value)
+                    for variable_id, start, *step, value in rows
+                ],
+            }
+        )
+        self._execute(
+            conn, "ALTER TABLE _csdb_series_staging ADD COLUMN digest VARCHAR;"
+        )
+        conn.register("_csdb_series_digests", digests)
+        try:
+            self._execute(
+                conn,
+                """UPDATE _csdb_series_staging AS s
+                SET digest = d.digest
+                FROM _csdb_series_digests AS d
+                WHERE s.variable_id = d.variable_id;""",
+            )
+        finally:
+            conn.unregister("_csdb_series_digests")
+        match = """s.digest = p.digest
+            AND s.variable_id = p.variable_id
+            AND s.start = p.start
+            AND s.step = p.step
+            AND s.value IS NOT DISTINCT FROM p.value"""
+        (added,) = self._execute(
+            conn,
+            f"""INSERT INTO payload (digest, variable_id, start, step, value)
+            SELECT s.digest, s.variable_id, s.start, s.step, s.value
+            FROM _csdb_series_staging AS s
+            WHERE NOT EXISTS (SELECT 1 FROM payload AS p WHERE {match});""",
+        ).fetchone()
+        logger.debug(f"stored {added} new series in payload")
+        self._execute(
+            conn,
+            f"""INSERT INTO series (run_id, variable_id, payload_id)
+            SELECT s.run_id, s.variable_id, p.id
+            FROM _csdb_series_staging AS s
+            JOIN payload AS p ON {match};""",
+        )
+
+    def _insert_result_from_csv(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        run_id: int,
+        df: pd.DataFrame,
+    ):
+        # Resolve all variable -> id in one query
+        variable_names = df["variable"].unique().tolist()
+        var_map = {
+            row[0]: row[1]
+            for row in self._execute(
+                conn,
+                "SELECT code_name, id FROM variable WHERE code_name IN ({})".format(
+                    ",".join("?" * len(variable_names))
+                ),
+                variable_names,
+            ).fetchall()
+        }
+
+        # Check if any variables are missing
+        missing = set(variable_names) - set(var_map.keys())
+        if missing:
+            raise ValueError(f"Variables not found in DB: {missing}")
+
+        # Prepare dataframe for batch insert
+        df = df.copy()
+        df["variable_id"] = df["variable"].map(var_map)
+        df["run_id"] = run_id
+        df["datetime"] = df["datetime"].dt.strftime("%Y-%m-%d")
+        df = df.loc[:, ["datetime", "value", "run_id", "variable_id"]]
+        df = df.sort_values(by=["variable_id", "run_id", "datetime"])
+        with tempfile.TemporaryDirectory(prefix="csdb") as TEMP:
+            csv_path = Path(TEMP) / f"{id(run_id)}.csv"
+            logger.debug(f"copying data to database, using temp: {csv_path}")
+            df.to_csv(csv_path, index=False, quoting=QUOTE_NONNUMERIC, header=False)
+            # COPY can't take its path as a parameter, the path is made by tempfile
+            conn.execute(f"COPY result from '{csv_path}' (DATEFORMAT '%Y-%m-%d');")
+
+    def _has_table(self, conn: duckdb.DuckDBPyConnection, table_name: str) -> bool:
+        found = self._execute(
+            conn,
+            "SELECT 1 FROM duckdb_tables() WHERE table_name = ?",
+            [table_name],
+        ).fetchone()
+        return found is not None
+
+    def _ensure_sidecar_tables(self, conn: duckdb.DuckDBPyConnection):
+        # Databases created before these tables existed get them on first write
+        for table_name, file_name in SIDECAR_TABLES.items():
+            if not self._has_table(conn, table_name):
+                conn.sql((SCHEMA_DIR / file_name).read_text())
+
+    def _get_dss_catalog(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        src: Path,
+    ) -> list[hecdss.DssPath] | None:
+        stat = src.stat()
+        rows = self._execute(
+            conn,
+            """SELECT a, b, c, d, e, f, record_type
+            FROM dss_catalog
+            WHERE source = ? AND size = ? AND mtime = ?
+            ORDER BY ordinal;""",
+            [str(src), stat.st_size, stat.st_mtime],
+        ).fetchall()
+        if not rows:
+            return None
+        logger.debug(f"using cached catalog for {src}")
+        return [
+            hecdss.DssPath(
+                path=f"/{a}/{b}/{c}/{d}/{e}/{f}/",
+                recType=RecordType(record_type),
             )
-            df = tbl.to_df()
-        if len(df) > 1:
-            logger.error(tbl)
-            raise ValueError(f"More than one object returned for {run_name=}\n{df}")
-        return schemas.Run.model_validate(df.loc[0, :].to_dict())
+            for a, b, c, d, e, f, record_type in rows
+        ]
+
+    def _put_dss_catalog(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        src: Path,
+        catalog: list[hecdss.DssPath],
+    ):
+        stat = src.stat()
+        # The order of the catalog is kept, the paths read from a DSS 6 file depend
+        # on it
+        df = pd.DataFrame.from_records(
+            [
+                (i, p.A, p.B, p.C, p.D, p.E, p.F, RecordType(p.recType).value)
+                for i, p in enumerate(catalog)
+            ],
+            columns=["ordinal", "a", "b", "c", "d", "e", "f", "record_type"],
+        )
+        logger.debug(f"caching catalog of {len(df)} paths for {src}")
+        self._execute(conn, "DELETE FROM dss_catalog WHERE source = ?;", [str(src)])
+        conn.register("_csdb_catalog_frame", df)
+        try:
+            self._execute(
+                conn,
+                """INSERT INTO dss_catalog
+                SELECT ?, ?, ?, ordinal, a, b, c, d, e, f, record_type
+                FROM _csdb_catalog_frame;""",
+                [str(src), stat.st_size, stat.st_mtime],
+            )
+        finally:
+            conn.unregister("_csdb_catalog_frame")
+
+    def _get_source_state(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        run_name: str,
+        src: Path,
+        variables: str,
+    ) -> Literal["new", "unchanged", "changed"]:
+        row = self._execute(
+            conn,
+            """SELECT size, mtime, digest, variables
+            FROM run_source
+            JOIN run ON run_source.run_id = run.id
+            WHERE run.name = ? AND run_source.source = ?;""",
+            [run_name, str(src)],
+        ).fetchone()
+        if row is None:
+            return "new"
+        size, mtime, digest, stored_variables = row
+        stat = src.stat()
+        if stored_variables != variables or stat.st_size != size:
+            return "changed"
+        if stat.st_mtime == mtime:
+            return "unchanged"
+        # The file was touched, but it might still have the same contents
+        if io.hash_file(src) != digest:
+            return "changed"
+        # The new time is kept, so the file isn't hashed again the next time
+        self._execute(
+            conn,
+            """UPDATE run_source SET mtime = ?
+            WHERE run_id = (SELECT id FROM run WHERE name = ?) AND source = ?;""",
+            [stat.st_mtime, run_name, str(src)],
+        )
+        return "unchanged"
+
+    def _put_source_fingerprint(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        run_id: int,
+        src: Path,
+        variables: str,
+        code_names: Iterable[str],
+    ):
+        fingerprint = io.get_file_fingerprint(src)
+        self._execute(
+            conn,
+            "INSERT OR REPLACE INTO run_source VALUES (?, ?, ?, ?, ?, ?, ?);",
+            [run_id, str(src), *fingerprint, variables, sorted(set(code_names))],
+        )
+
+    def _delete_source_results(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        run_id: int,
+        src: Path,
+    ):
+        # The results a source added to the run before, by the variables read from it
+        row = self._execute(
+            conn,
+            "SELECT code_names FROM run_source WHERE run_id = ? AND source = ?;",
+            [run_id, str(src)],
+        ).fetchone()
+        if row is not None:
+            self._delete_result_variables(conn, run_id, row[0])
+
+    def _delete_result_variables(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        run_id: int,
+        code_names: list[str],
+    ):
+        self._delete_results(
+            conn,
+            """run_id = ?
+            AND variable_id IN (
+                SELECT id FROM variable WHERE list_contains(?, code_name)
+            )""",
+            [run_id, code_names],
+        )
 
     def put_run_from_dataframe(
         self,
         run_name: str,
         df: pd.DataFrame,
         src: str | Path | None = None,
+        method: Literal["frame", "csv", "bulk"] = "frame",
     ) -> tuple[schemas.Run, list[schemas.Variable], pd.DataFrame]:
         """Add a run and its results to the database.
 
@@ -431,11 +1280,21 @@ class Client:
         src : str | Path, optional
             The source to record for the run, if it isn't given it's recorded as the
             DataFrames memory location, by default None
+        method : Literal["frame", "csv", "bulk"], optional
+            How the data is handed to the database. "frame" lets duckdb read the
+            DataFrame directly, keeping the column types intact. "csv" writes the data
+            to a temporary csv file and copies it into the database, and is kept as a
+            fallback. "bulk" stages the data in a table without constraints, checks
+            the whole batch for unknown variables, duplicate dates, and overlaps
+            with the run at once, and then merges it. Writes to an "archive"
+            database always use "bulk", and writes to a "dense" or "dedup"
+            database ignore `method`, they are always staged and validated the
+            same way before being stored as series, by default "frame"
 
         Returns
         -------
         tuple[schemas.Run, list[schemas.Variable], pd.DataFrame]
-            The Run obejct, Variable objects, and pivoted DataFrame for the Run affected
+            The Run object, Variable objects, and pivoted DataFrame for the Run affected
 
         Example
         -------
@@ -450,6 +1309,9 @@ class Client:
         ValueError
             Raised if there are variables in the DataFrame that aren't already known in
             the database. Try adding them using `client.put_variable(...)` first.
+        duckdb.ConstraintException
+            Raised if the data has missing (NULL or NaN) dates or values, more than
+            one value for a variable and date, or the run already has data for them.
         """
         if src is None:
             src = str(f"{df.__class__.__name__}@{id(df)}")
@@ -457,58 +1319,29 @@ class Client:
             src = str(src)
         df.columns = [c.lower() for c in df.columns]  # clean up capitalization
         df = df.loc[:, EXPECTED_RESULT_DF_COLUMNS]  # clean up the order
-        with duckdb.connect(self.__src, read_only=False) as conn:
-            conn.execute(
-                "INSERT OR IGNORE INTO run (id, name, source) "
-                + "VALUES (nextval('seq_run'), ?, ?) "
-                + "RETURNING id",
-                [run_name, src],
-            )
-            added = conn.execute(
-                f"SELECT id FROM run WHERE run.name = '{run_name}'"
-            ).fetchone()
-            if added is None:
-                raise duckdb.DataError(f"Couldn't find {run_name=}")
-            run_id = added[0]
-            # Resolve all variable -> id in one query
-            variable_names = df["variable"].unique().tolist()
-            var_map = {
-                row[0]: row[1]
-                for row in conn.execute(
-                    "SELECT code_name, id FROM variable WHERE code_name IN ({})".format(
-                        ",".join("?" * len(variable_names))
-                    ),
-                    variable_names,
-                ).fetchall()
-            }
-
-            # Check if any variables are missing
-            missing = set(variable_names) - set(var_map.keys())
-            if missing:
-                raise ValueError(f"Variables not found in DB: {missing}")
-
-            # Prepare dataframe for batch insert
-            df["variable_id"] = df["variable"].map(var_map)
-            df["run_id"] = run_id
-            df["datetime"] = df["datetime"].dt.strftime("%Y-%m-%d")
-            df = df.loc[:, ["datetime", "value", "run_id", "variable_id"]]
-            df = df.sort_values(by=["variable_id", "run_id", "datetime"])
-            with tempfile.TemporaryDirectory(prefix="csdb") as TEMP:
-                csv_path = Path(TEMP) / f"{id(run_id)}.csv"
-                logger.debug(f"copying data to database, using temp: {csv_path}")
-                df.to_csv(csv_path, index=False, quoting=QUOTE_NONNUMERIC, header=False)
-                conn.execute(f"COPY result from '{csv_path}' (DATEFORMAT '%Y-%m-%d');")
+        with self._connect(read_only=False) as conn:
+            conn.begin()
+            try:
+                run_id = self._insert_run(conn, run_name, src)
+                self._insert_result(conn, run_id, df, method=method)
+            except Exception:
+                conn.rollback()
+                raise
+            conn.commit()
         return self.get_result_by_run(run_name=run_name)
 
     def put_run_from_dss(
         self,
         run_name: str,
         src: str | Path,
-    ) -> tuple[schemas.Run, list[schemas.Variable], pd.DataFrame]:
+        chunk_size: int | None = None,
+        skip_unchanged: bool = True,
+    ) -> tuple[schemas.Run, list[schemas.Variable], pd.DataFrame] | schemas.Run:
         """Add a run and its results to the database.
 
         Each variable in the database is looked for in the DSS, overlapping variables
-        are read and saved.
+        are read and saved. If the DSS file was already added to the run, the results
+        it added before are replaced by the results read now.
 
         Parameters
         ----------
@@ -516,11 +1349,23 @@ class Client:
             The name to use for the run in the database
         src : str | Path
             The path to the DSS file to read
+        chunk_size : int | None, optional
+            If given, the DSS file is streamed into the database this many timeseries
+            at a time (all within one transaction), so the memory used is bounded by
+            the chunk size instead of the size of the DSS file, by default None
+        skip_unchanged : bool, optional
+            If True, and this DSS file was already added to the run, the file is only
+            read again if it changed since it was added. The size, modification time,
+            and hash of the file are used to tell if it changed, as well as the list
+            of variables in the database, by default True
 
         Returns
         -------
-        tuple[schemas.Run, list[schemas.Variable], pd.DataFrame]
-            The Run obejct, Variable objects, and pivoted DataFrame for the Run affected
+        tuple[schemas.Run, list[schemas.Variable], pd.DataFrame] | schemas.Run
+            The Run object, Variable objects, and pivoted DataFrame for the Run
+            affected. If `chunk_size` is given, or the file is skipped because it's
+            unchanged, only the Run object is returned, and the results aren't read
+            back, use `get_result_by_run` to read them.
 
         Example
         -------
@@ -529,18 +1374,147 @@ class Client:
             >>> client.put_run_from_dss("Example Run", src="foo.dss")
         """
         # Get the current set of variables to know what datasets to read from the DSS
-        df_variables = (
-            self.get_table_as_dataframe("variable")
-            .set_index("code_name", drop=False)
-            .rename(
-                columns={"id": "variable_id", "code_name": "code_name"},
-            )
-        )
-        paths = io.get_intersecting_catalog(src, df_variables.index)
-        df = io.load_dss(src, paths)
-        df["run"] = run_name
+        code_names = self.get_table_as_dataframe("variable")["code_name"].tolist()
+        variables = _digest_code_names(code_names)
+        src = Path(src).absolute()
+        with self._connect(read_only=False) as conn:
+            self._ensure_sidecar_tables(conn)
+            state = self._get_source_state(conn, run_name, src, variables)
+            if skip_unchanged and state == "unchanged":
+                logger.info(f"{src} is unchanged since it was added, skipping")
+                return self._get_runs(conn, [run_name])[0]
+            conn.begin()
+            try:
+                run_id = self._insert_run(conn, run_name, str(src))
+                if state != "new":
+                    self._delete_source_results(conn, run_id, src)
+                catalog = self._get_dss_catalog(conn, src)
+                read = list()
+                with io.DssReader(src, catalog=catalog) as reader:
+                    paths = reader.get_intersecting_catalog(code_names)
+                    if catalog is None:
+                        self._put_dss_catalog(conn, src, reader.catalog)
+                    if chunk_size is None:
+                        chunks = [reader.load(paths)]
+                    else:
+                        chunks = reader.iter_chunks(paths, chunk_size)
+                    for df in chunks:
+                        replaced = df["variable"].unique().tolist()
+                        if state != "new":
+                            self._delete_result_variables(conn, run_id, replaced)
+                        self._insert_result(conn, run_id, df)
+                        read.extend(replaced)
+                self._put_source_fingerprint(conn, run_id, src, variables, read)
+            except Exception:
+                conn.rollback()
+                raise
+            conn.commit()
+            if chunk_size is not None:
+                # Reading the whole run back would undo the bound on the memory used
+                return self._get_runs(conn, [run_name])[0]
+        return self.get_result_by_run(run_name=run_name)
+
+    def put_runs_from_dss(
+        self,
+        sources: Mapping[str, str | Path] | Iterable[str | Path],
+        max_workers: int | None = None,
+        ordered: bool = True,
+        skip_unchanged: bool = True,
+    ) -> list[schemas.Run]:
+        """Add many runs and their results to the database from DSS files.
+
+        The DSS files are read in a pool of worker processes, and the results are
+        written to the database by a single connection in the calling process, so
+        reading many files scales with the number of cores available. Each run is
+        written in its own transaction.
+
+        Parameters
+        ----------
+        sources : Mapping[str, str | Path] | Iterable[str | Path]
+            The DSS files to read. If a mapping is given, the keys are used as the run
+            names, otherwise the file names (without suffix) are used.
+        max_workers : int | None, optional
+            The number of worker processes used to read the DSS files, if None the
+            number of CPUs is used, by default None
+        ordered : bool, optional
+            If True, the runs are written in the order they were given. If False, the
+            runs are written as soon as they are read, by default True
+        skip_unchanged : bool, optional
+            If True, DSS files that were already added to their run and haven't changed
+            since are skipped without being read, see `put_run_from_dss`, by default
+            True
 
-        return self.put_run_from_dataframe(run_name, df, src=src)
+        Returns
+        -------
+        list[schemas.Run]
+            The Run objects added, in the order they were written
+
+        Example
+        -------
+            >>> import csdb
+            >>> from pathlib import Path
+            >>> client = csdb.Client("foo.db")
+            >>> files = sorted(Path("study").glob("*.dss"))
+            >>> runs = client.put_runs_from_dss(files, max_workers=4)
+
+        Raises
+        ------
+        ValueError
+            Raised if two runs would have the same name, or the same DSS file is
+            given for more than one run
+        """
+        if isinstance(sources, Mapping):
+            items = [(name, Path(src).absolute()) for name, src in sources.items()]
+        else:
+            items = [(Path(src).stem, Path(src).absolute()) for src in sources]
+        names = [name for name, _ in items]
+        if len(set(names)) != len(names):
+            raise ValueError(f"run names must be unique: {names}")
+        paths = [src for _, src in items]
+        if len(set(paths)) != len(paths):
+            raise ValueError(f"each DSS file can only be given once: {paths}")
+        run_names = {src: name for name, src in items}
+        code_names = self.get_table_as_dataframe("variable")["code_name"].tolist()
+        variables = _digest_code_names(code_names)
+        written = list()
+        with self._connect(read_only=False) as conn:
+            self._ensure_sidecar_tables(conn)
+            states = {
+                src: self._get_source_state(conn, run_name, src, variables)
+                for src, run_name in run_names.items()
+            }
+            if skip_unchanged:
+                for src, state in states.items():
+                    if state == "unchanged":
+                        logger.info(f"{src} is unchanged since it was added, skipping")
+                        del run_names[src]
+            catalogs = {src: self._get_dss_catalog(conn, src) for src in run_names}
+            for src, df, catalog in io.iter_load_intersecting_dss(
+                run_names,
+                code_names,
+                max_workers=max_workers,
+                ordered=ordered,
+                catalogs=catalogs,
+            ):
+                run_name = run_names[src]
+                logger.info(f"writing {run_name=} from {src}")
+                conn.begin()
+                try:
+                    if catalogs[src] is None:
+                        self._put_dss_catalog(conn, src, catalog)
+                    run_id = self._insert_run(conn, run_name, str(src))
+                    replaced = df["variable"].unique().tolist()
+                    if states[src] != "new":
+                        self._delete_source_results(conn, run_id, src)
+                        self._delete_result_variables(conn, run_id, replaced)
+                    self._insert_result(conn, run_id, df)
+                    self._put_source_fingerprint(conn, run_id, src, variables, replaced)
+                except Exception:
+                    conn.rollback()
+                    raise
+                conn.commit()
+                written.append(run_name)
+            return self._get_runs(conn, written)
 
     def delete_run(self, run_name: str) -> None:
         """Remove a run and it's result data from the database.
@@ -556,36 +1530,48 @@ class Client:
             >>> client = csdb.Client("foo.db")
             >>> client.delete_run("BAD_RUN_OOPS")
         """
-        with duckdb.connect(self.__src, read_only=False) as conn:
-            # First delete results
-            conn.execute(
-                """
-                DELETE FROM result
-                WHERE run_id = (SELECT id FROM run WHERE name = ?)
-                """,
+        with self._connect(read_only=False) as conn:
+            # First delete the results and source fingerprints
+            if self._has_table(conn, "run_source"):
+                self._execute(
+                    conn,
+                    """
+                    DELETE FROM run_source
+                    WHERE run_id = (SELECT id FROM run WHERE name = ?)
+                    """,
+                    [run_name],
+                )
+            self._delete_results(
+                conn,
+                "run_id = (SELECT id FROM run WHERE name = ?)",
                 [run_name],
             )
             # Then delete the run itself
-            conn.execute(
+            self._execute(
+                conn,
                 "DELETE FROM run WHERE name = ?",
                 [run_name],
             )
 
+    @cached
     def get_result_by_run(
         self,
         run_name: str,
-    ) -> tuple[schemas.Run, list[schemas.Variable], pd.DataFrame]:
+        output: OutputFormat = "pandas",
+    ) -> tuple[schemas.Run, list[schemas.Variable], OutputData]:
         """Get all the data out of the database for a single run.
 
         Parameters
         ----------
         run_name : str
             The name of the run to get data for
+        output : OutputFormat, optional
+            The format to return the data in, see `csdb.Client`, by default "pandas"
 
         Returns
         -------
-        tuple[schemas.Run, list[schemas.Variable], pd.DataFrame]
-            The Run obejct, Variable objects, and pivoted DataFrame of the data added
+        tuple[schemas.Run, list[schemas.Variable], OutputData]
+            The Run object, Variable objects, and pivoted DataFrame of the data added
 
         Example
         -------
@@ -609,36 +1595,37 @@ class Client:
             ...         ...     ...     ...
             2021-09-30  78.9    7.89    0.789
         """
-        run_obj = self._get_run(run_name)
-        with duckdb.connect(self.__src, read_only=True) as conn:
-            q = f"""SELECT
-                    result.datetime AS datetime,
-                    variable.code_name AS variable,
-                    result.value AS value,
-                FROM result
-                JOIN run ON result.run_id = run.id
-                JOIN variable ON result.variable_id = variable.id
-                WHERE run.name = '{run_name}';"""
-            df = conn.sql(q).to_df()
-        df = df.pivot(index="datetime", columns="variable", values="value")
-        variables = [self.get_variable(code_name=v) for v in df.columns.unique()]
+        where, params = self._results_filter(runs=run_name)
+        with self._connect(read_only=True) as conn:
+            (run_obj,) = self._get_runs(conn, [run_name])
+            rows = self._distinct_results(conn, ["variable"], where, params)
+            code_names = [code_name for (code_name,) in rows]
+            variables = self._get_variables(conn, code_names)
+            labels = pd.Index(code_names, name="variable")
+            df = self._pivot_results(
+                conn, "variable", code_names, labels, where, params, output
+            )
         return run_obj, variables, df
 
+    @cached
     def get_result_by_variable(
         self,
         code_name: str,
-    ) -> tuple[list[schemas.Run], schemas.Variable, pd.DataFrame]:
+        output: OutputFormat = "pandas",
+    ) -> tuple[list[schemas.Run], schemas.Variable, OutputData]:
         """Get all the data out of the database for a single variable.
 
         Parameters
         ----------
         code_name : str
             The name of the variable to get data for, using the WRESL+ name
+        output : OutputFormat, optional
+            The format to return the data in, see `csdb.Client`, by default "pandas"
 
         Returns
         -------
-        tuple[list[schemas.Run], schemas.Variable, pd.DataFrame]
-            The Run obejcts, Variable object, and pivoted DataFrame of the data added
+        tuple[list[schemas.Run], schemas.Variable, OutputData]
+            The Run objects, Variable object, and pivoted DataFrame of the data added
 
         Example
         -------
@@ -662,18 +1649,716 @@ class Client:
             ...         ...     ...     ...
             2021-09-30  78.9    7.89    0.789
         """
-        variable_object = self.get_variable(code_name=code_name)
-        with duckdb.connect(self.__src, read_only=True) as conn:
-            q = f"""SELECT
-                    run.name AS run,
-                    result.datetime AS datetime,
-                    result.value AS value,
-                FROM result
-                JOIN run ON result.run_id = run.id
-                JOIN variable ON result.variable_id = variable.id
-                WHERE variable.code_name = '{variable_object.code_name}';"""
-
-            df = conn.sql(q).to_df()
-        df = df.pivot(index="datetime", columns="run", values="value")
-        runs = [self._get_run(run_name=v) for v in df.columns.unique()]
+        where, params = self._results_filter(variables=code_name)
+        with self._connect(read_only=True) as conn:
+            (variable_object,) = self._get_variables(conn, [code_name])
+            rows = self._distinct_results(conn, ["run"], where, params)
+            run_names = [run_name for (run_name,) in rows]
+            runs = self._get_runs(conn, run_names)
+            labels = pd.Index(run_names, name="run")
+            df = self._pivot_results(
+                conn, "run", run_names, labels, where, params, output
+            )
         return runs, variable_object, df
+
+    def _fetch(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        query: str,
+        params: list | None = None,
+        output: OutputFormat = "pandas",
+        columns: list[str] | None = None,
+    ):
+        # Run the query and fetch the result in the output format. Arrow and polars
+        # are fetched through duckdb's arrow path, and numpy as a dict of arrays.
+        # The columns, if given, rename the result by position.
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(f"expected one of {OUTPUT_FORMATS}, got {output=}")
+        result = self._execute(conn, query, params)
+        if output == "pandas":
+            data = result.df()
+            if columns is not None:
+                data.columns = columns
+        elif output == "arrow":
+            data = result.fetch_arrow_table()
+            if columns is not None:
+                data = data.rename_columns(columns)
+        elif output == "polars":
+            data = result.pl()
+            if columns is not None:
+                data.columns = columns
+        else:
+            data = result.fetchnumpy()
+            if columns is not None:
+                data = dict(zip(columns, data.values()))
+        return data
+
+    def _results_source(self) -> str:
+        # The long results joined to their names, every read query selects from this
+        # relation so that the storage behind it can change without changing them.
+        return """(
+            SELECT
+                run.name AS run,
+                variable.code_name AS variable,
+                variable.kind AS kind,
+                result.datetime AS datetime,
+                result.value AS value,
+            FROM result
+            JOIN run ON result.run_id = run.id
+            JOIN variable ON result.variable_id = variable.id
+        )"""
+
+    def _results_filter(
+        self,
+        runs: str | Iterable[str] | None = None,
+        variables: str | Iterable[str] | None = None,
+        start: str | pd.Timestamp | None = None,
+        end: str | pd.Timestamp | None = None,
+    ) -> tuple[str, list]:
+        # The WHERE clause and its parameters, duckdb pushes these into the scan
+        conditions = list()
+        params = list()
+        if runs is not None:
+            conditions.append("list_contains(?, run)")
+            params.append([runs] if isinstance(runs, str) else list(runs))
+        if variables is not None:
+            conditions.append("list_contains(?, variable)")
+            params.append(
+                [variables] if isinstance(variables, str) else list(variables)
+            )
+        if start is not None:
+            conditions.append("datetime >= ?")
+            params.append(pd.Timestamp(start).date())
+        if end is not None:
+            conditions.append("datetime <= ?")
+            params.append(pd.Timestamp(end).date())
+        if not conditions:
+            return "", params
+        return "WHERE " + " AND ".join(conditions), params
+
+    def results(
+        self,
+        runs: str | Iterable[str] | None = None,
+        variables: str | Iterable[str] | None = None,
+        start: str | pd.Timestamp | None = None,
+        end: str | pd.Timestamp | None = None,
+    ) -> duckdb.DuckDBPyRelation:
+        """Get a lazy relation of the results, to build queries that run in duckdb.
+
+        Nothing is read until the relation is materialized, so filters, joins and
+        aggregations added to the relation are evaluated by the database. The
+        relation has the columns `run`, `variable`, `kind`, `datetime` and `value`.
+
+        A relation belongs to the connection that made it, so the client must be
+        open, and the relation can only be used while the client stays open, on the
+        thread that made it.
+
+        Parameters
+        ----------
+        runs : str | Iterable[str] | None, optional
+            The name(s) of the runs to include, by default all runs
+        variables : str | Iterable[str] | None, optional
+            The WRESL+ name(s) of the variables to include, by default all variables
+        start : str | pd.Timestamp | None, optional
+            The first date to include, by default the start of the data
+        end : str | pd.Timestamp | None, optional
+            The last date to include, by default the end of the data
+
+        Returns
+        -------
+        duckdb.DuckDBPyRelation
+            The relation of the filtered results
+
+        Example
+        -------
+            >>> import csdb
+            >>> with csdb.Client("file.db").open(read_only=True) as client:
+                    rel = client.results(variables=["S_OROVL", "S_SHSTA"])
+                    df = (
+                        rel.filter("month(datetime) = 9")
+                        .aggregate("run, variable, min(value) AS low")
+                        .df()
+                    )
+
+        Raises
+        ------
+        duckdb.ConnectionException
+            Raised if the client isn't open.
+        """
+        where, params = self._results_filter(runs, variables, start, end)
+        q = f"""SELECT run, variable, kind, datetime, value
+            FROM {self._results_source()}
+            {where}"""
+        return self._cursor().sql(q, params=params)
+
+    def _distinct_results(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        columns: list[str],
+        where: str,
+        params: list,
+    ) -> list[tuple]:
+        # The sorted, unique combinations of the columns in the filtered results
+        columns = ", ".join(columns)
+        q = f"""SELECT DISTINCT {columns}
+            FROM {self._results_source()}
+            {where}
+            ORDER BY {columns};"""
+        return self._execute(conn, q, params).fetchall()
+
+    def _pivot_results(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        on: str,
+        keys: list[str],
+        labels: pd.Index,
+        where: str,
+        params: list,
+        output: OutputFormat = "pandas",
+    ):
+        # The wide table is built by duckdb, and only the wide table is transferred.
+        # Listing the keys lets the PIVOT be planned without a first pass over the
+        # data, and fixes the order of the columns to the order of the keys.
+        if keys:
+            in_list = ", ".join(_quote_literal(key) for key in keys)
+            q = f"""PIVOT (
+                    SELECT datetime, {on} AS pivot_key, value
+                    FROM {self._results_source()}
+                    {where}
+                )
+                ON pivot_key IN ({in_list})
+                USING first(value)
+                GROUP BY datetime
+                ORDER BY datetime;"""
+        else:
+            q = "SELECT CAST(NULL AS DATE) AS datetime WHERE false;"
+            params = None
+        if output == "pandas":
+            df = self._fetch(conn, q, params).set_index("datetime")
+            df.columns = labels
+            return df
+        # formats without an index get a datetime column, and flat column names
+        if isinstance(labels, pd.MultiIndex):
+            labels = ["/".join(label) for label in labels]
+        if "datetime" in labels:
+            raise ValueError(
+                f"a column named 'datetime' can't be returned as {output=}, it is"
+                " used for the dates, use output='pandas' instead"
+            )
+        return self._fetch(conn, q, params, output, ["datetime", *labels])
+
+    @cached
+    def query(
+        self,
+        runs: str | Iterable[str] | None = None,
+        variables: str | Iterable[str] | None = None,
+        start: str | pd.Timestamp | None = None,
+        end: str | pd.Timestamp | None = None,
+        wide: bool = False,
+        output: OutputFormat = "pandas",
+    ) -> OutputData:
+        """Get the data for any number of runs and variables in a single query.
+
+        The run, variable and date filters are evaluated by the database, so only
+        the rows that are asked for are read.
+
+        Parameters
+        ----------
+        runs : str | Iterable[str] | None, optional
+            The name(s) of the runs to get data for, by default all runs
+        variables : str | Iterable[str] | None, optional
+            The WRESL+ name(s) of the variables to get data for, by default all
+            variables
+        start : str | pd.Timestamp | None, optional
+            The first date to include, by default the start of the data
+        end : str | pd.Timestamp | None, optional
+            The last date to include, by default the end of the data
+        wide : bool, optional
+            Whether to return a wide DataFrame indexed by date with a (run,
+            variable) column for each series, by default False. Formats other than
+            "pandas" name these columns "run/variable".
+        output : OutputFormat, optional
+            The format to return the data in, see `csdb.Client`, by default "pandas"
+
+        Returns
+        -------
+        OutputData
+            The tidy data, with the columns `run`, `variable`, `datetime` and
+            `value`, or the wide data if `wide=True`
+
+        Example
+        -------
+            >>> import csdb
+            >>> client = csdb.Client("file.db")
+            >>> df = client.query(
+                runs=["RUN 1", "RUN 2"],
+                variables=["S_OROVL", "S_SHSTA"],
+                start="2000-10-31",
+                end="2010-09-30",
+                wide=True,
+            )
+            >>> df
+            run         RUN 1             RUN 2
+            variable    S_OROVL  S_SHSTA  S_OROVL  S_SHSTA
+            datetime
+            2000-10-31  12.3     1.23     0.123    0.0123
+            ...         ...      ...      ...      ...
+            2010-09-30  78.9     7.89     0.789    0.0789
+        """
+        where, params = self._results_filter(runs, variables, start, end)
+        q = f"""SELECT run, variable, datetime, value
+            FROM {self._results_source()}
+            {where}
+            ORDER BY run, variable, datetime;"""
+        with self._connect(read_only=True) as conn:
+            if not wide:
+                return self._fetch(conn, q, params, output)
+            pairs = self._distinct_results(conn, ["run", "variable"], where, params)
+            # a unit separator joins the pair into a single key to pivot on
+            keys = [f"{run}\x1f{variable}" for run, variable in pairs]
+            on = "run || chr(31) || variable"
+            labels = pd.MultiIndex.from_tuples(pairs, names=["run", "variable"])
+            return self._pivot_results(conn, on, keys, labels, where, params, output)
+
+    @cached
+    def aggregate(
+        self,
+        runs: str | Iterable[str] | None = None,
+        variables: str | Iterable[str] | None = None,
+        by: Literal[
+            "water_year",
+            "calendar_year",
+            "month",
+            "period_of_record",
+        ] = "water_year",
+        how: Literal["sum", "mean", "min", "max", "median", "count", "std"] = "mean",
+        start: str | pd.Timestamp | None = None,
+        end: str | pd.Timestamp | None = None,
+        output: OutputFormat = "pandas",
+    ) -> OutputData:
+        """Summarize the results by period, computed in the database.
+
+        Only the aggregated rows are returned, the full timeseries are never read
+        into Python.
+
+        Parameters
+        ----------
+        runs : str | Iterable[str] | None, optional
+            The name(s) of the runs to summarize, by default all runs
+        variables : str | Iterable[str] | None, optional
+            The WRESL+ name(s) of the variables to summarize, by default all
+            variables
+        by : Literal["water_year", "calendar_year", "month", "period_of_record"]
+            The period to group the results by, by default "water_year". Water
+            years start in October, so the value for 1921-10-31 is part of water
+            year 1922. Grouping by "month" summarizes each calendar month across all
+            years, and "period_of_record" summarizes each series as a whole.
+        how : Literal["sum", "mean", "min", "max", "median", "count", "std"]
+            The statistic to compute for each group, by default "mean"
+        start : str | pd.Timestamp | None, optional
+            The first date to include, by default the start of the data
+        end : str | pd.Timestamp | None, optional
+            The last date to include, by default the end of the data
+        output : OutputFormat, optional
+            The format to return the data in, see `csdb.Client`, by default "pandas"
+
+        Returns
+        -------
+        OutputData
+            The tidy summary, with the columns `run`, `variable`, the period named
+            by `by` (except for "period_of_record"), and `value`
+
+        Example
+        -------
+            >>> import csdb
+            >>> client = csdb.Client("file.db")
+            >>> client.aggregate(
+                runs=["RUN 1", "RUN 2"],
+                variables="C_CAA003",
+                by="water_year",
+                how="mean",
+            )
+                run     variable    water_year  value
+            0   RUN 1   C_CAA003    1922        12.3
+            1   RUN 1   C_CAA003    1923        45.6
+            ...
+
+        Raises
+        ------
+        ValueError
+            Raised if `by` or `how` isn't one of the supported options.
+        """
+        if by not in AGGREGATE_PERIODS:
+            raise ValueError(f"expected one of {tuple(AGGREGATE_PERIODS)}, got {by=}")
+        if how not in AGGREGATE_FUNCTIONS:
+            raise ValueError(
+                f"expected one of {tuple(AGGREGATE_FUNCTIONS)}, got {how=}"
+            )
+        columns = ["run", "variable"]
+        groups = ["run", "variable"]
+        if AGGREGATE_PERIODS[by] is not None:
+            columns.append(f"{AGGREGATE_PERIODS[by]} AS {by}")
+            groups.append(by)
+        groups = ", ".join(groups)
+        where, params = self._results_filter(runs, variables, start, end)
+        q = f"""SELECT
+                {", ".join(columns)},
+                {AGGREGATE_FUNCTIONS[how]}(value) AS value,
+            FROM {self._results_source()}
+            {where}
+            GROUP BY {groups}
+            ORDER BY {groups};"""
+        with self._connect(read_only=True) as conn:
+            return self._fetch(conn, q, params, output)
+
+    @cached
+    def exceedance(
+        self,
+        runs: str | Iterable[str] | None = None,
+        variables: str | Iterable[str] | None = None,
+        probabilities: Iterable[float] | None = None,
+        months: int | Iterable[int] | None = None,
+        water_year_types: int | Iterable[int] | None = None,
+        water_year_type_variable: str = "WYT_SAC_",
+        start: str | pd.Timestamp | None = None,
+        end: str | pd.Timestamp | None = None,
+        output: OutputFormat = "pandas",
+    ) -> OutputData:
+        """Get the exceedance probabilities of the results, computed in the database.
+
+        Each run and variable is ranked separately. Without `probabilities` the
+        whole curve is returned, using the Weibull plotting position
+        `rank / (n + 1)`. With `probabilities`, only the values exceeded that often
+        are returned, interpolated between the results.
+
+        Parameters
+        ----------
+        runs : str | Iterable[str] | None, optional
+            The name(s) of the runs to rank, by default all runs
+        variables : str | Iterable[str] | None, optional
+            The WRESL+ name(s) of the variables to rank, by default all variables
+        probabilities : Iterable[float] | None, optional
+            The exceedance probabilities, between 0 and 1, to get the values for, by
+            default the whole curve
+        months : int | Iterable[int] | None, optional
+            Only rank the results in these calendar months (1-12), by default all
+            months
+        water_year_types : int | Iterable[int] | None, optional
+            Only rank the results in months where `water_year_type_variable` has
+            one of these values in the same run, by default all years
+        water_year_type_variable : str, optional
+            The WRESL+ name of the variable that classifies the water year type, by
+            default "WYT_SAC_"
+        start : str | pd.Timestamp | None, optional
+            The first date to include, by default the start of the data
+        end : str | pd.Timestamp | None, optional
+            The last date to include, by default the end of the data
+        output : OutputFormat, optional
+            The format to return the data in, see `csdb.Client`, by default "pandas"
+
+        Returns
+        -------
+        OutputData
+            The tidy exceedance table, with the columns `run`, `variable`,
+            `probability` and `value`
+
+        Example
+        -------
+            >>> import csdb
+            >>> client = csdb.Client("file.db")
+            >>> client.exceedance(
+                runs=["RUN 1", "RUN 2"],
+                variables="S_OROVL",
+                probabilities=[0.1, 0.5, 0.9],
+                months=9,
+            )
+                run     variable    probability value
+            0   RUN 1   S_OROVL     0.1         3012.3
+            1   RUN 1   S_OROVL     0.5         2045.6
+            2   RUN 1   S_OROVL     0.9         1078.9
+            ...
+
+        Raises
+        ------
+        ValueError
+            Raised if a probability isn't between 0 and 1.
+        """
+        where, params = self._results_filter(runs, variables, start, end)
+        conditions = list()
+        if water_year_types is not None:
+            if isinstance(water_year_types, int):
+                water_year_types = [water_year_types]
+            selected = f"""SELECT f.run, f.variable, f.datetime, f.value
+                FROM filtered AS f
+                JOIN {self._results_source()} AS wyt
+                    ON wyt.run = f.run AND wyt.datetime = f.datetime"""
+            conditions.append("wyt.variable = ?")
+            conditions.append("list_contains(?, CAST(wyt.value AS INTEGER))")
+            params.extend([water_year_type_variable, list(water_year_types)])
+        else:
+            selected = "SELECT run, variable, datetime, value FROM filtered AS f"
+        if months is not None:
+            if isinstance(months, int):
+                months = [months]
+            conditions.append("list_contains(?, month(f.datetime))")
+            params.append(list(months))
+        if conditions:
+            selected += "\nWHERE " + " AND ".join(conditions)
+        if probabilities is None:
+            ranked = """SELECT
+                    run,
+                    variable,
+                    row_number() OVER ranks
+                        / (count(*) OVER (PARTITION BY run, variable) + 1)
+                        AS probability,
+                    value,
+                FROM selected
+                WINDOW ranks AS (PARTITION BY run, variable ORDER BY value DESC)"""
+        else:
+            probabilities = sorted(float(p) for p in probabilities)
+            if any((p < 0) or (p > 1) for p in probabilities):
+                raise ValueError(
+                    f"expected probabilities in [0, 1], got {probabilities}"
+                )
+            # the value exceeded with probability p is the (1 - p) quantile
+            ranked = """SELECT
+                    run,
+                    variable,
+                    unnest(?::DOUBLE[]) AS probability,
+                    unnest(quantile_cont(value, ?::DOUBLE[])) AS value,
+                FROM selected
+                GROUP BY run, variable"""
+            params.extend([probabilities, [1 - p for p in probabilities]])
+        q = f"""WITH
+                filtered AS (
+                    SELECT run, variable, datetime, value
+                    FROM {self._results_source()}
+                    {where}
+                ),
+                selected AS ({selected})
+            SELECT run, variable, probability, CAST(value AS DOUBLE) AS value
+            FROM ({ranked})
+            ORDER BY run, variable, probability;"""
+        with self._connect(read_only=True) as conn:
+            return self._fetch(conn, q, params, output)
+
+    @cached
+    def compare_runs(
+        self,
+        base: str,
+        alts: str | Iterable[str],
+        variables: str | Iterable[str] | None = None,
+        how: Literal["absolute", "percent"] = "absolute",
+        by: (
+            Literal["water_year", "calendar_year", "month", "period_of_record"] | None
+        ) = None,
+        agg: Literal["sum", "mean", "min", "max", "median", "count", "std"] = "mean",
+        start: str | pd.Timestamp | None = None,
+        end: str | pd.Timestamp | None = None,
+        output: OutputFormat = "pandas",
+    ) -> OutputData:
+        """Compare alternative runs to a base run, computed in the database.
+
+        All of the alternatives are compared in one query that joins the results
+        of each alternative to the base run on the variable and date.
+
+        Parameters
+        ----------
+        base : str
+            The name of the run to compare against
+        alts : str | Iterable[str]
+            The name(s) of the runs to compare to the base run
+        variables : str | Iterable[str] | None, optional
+            The WRESL+ name(s) of the variables to compare, by default all variables
+        how : Literal["absolute", "percent"], optional
+            Whether to compute the difference `alt - base`, or the percent
+            difference `100 * (alt - base) / base`, by default "absolute". The
+            percent difference is missing where the base is zero.
+        by : Literal["water_year", "calendar_year", "month", "period_of_record"]
+            If given, the results are summarized by this period before they are
+            compared, see `Client.aggregate`. By default each date is compared.
+        agg : Literal["sum", "mean", "min", "max", "median", "count", "std"]
+            The statistic used to summarize the periods when `by` is given, by
+            default "mean"
+        start : str | pd.Timestamp | None, optional
+            The first date to include, by default the start of the data
+        end : str | pd.Timestamp | None, optional
+            The last date to include, by default the end of the data
+        output : OutputFormat, optional
+            The format to return the data in, see `csdb.Client`, by default "pandas"
+
+        Returns
+        -------
+        OutputData
+            The tidy comparison, with the columns `run`, `variable`, `datetime` (or
+            the period named by `by`), `base`, `alt` and `difference`
+
+        Example
+        -------
+            >>> import csdb
+            >>> client = csdb.Client("file.db")
+            >>> client.compare_runs(
+                base="Baseline",
+                alts=["Alt 1", "Alt 2"],
+                variables=["C_CAA003", "S_OROVL"],
+                by="water_year",
+                agg="sum",
+            )
+                run     variable    water_year  base    alt     difference
+            0   Alt 1   C_CAA003    1922        12.3    13.4    1.1
+            1   Alt 1   C_CAA003    1923        45.6    43.2    -2.4
+            ...
+
+        Raises
+        ------
+        ValueError
+            Raised if a run can't be found, or `how`, `by` or `agg` isn't one of the
+            supported options.
+        """
+        alts = [alts] if isinstance(alts, str) else list(alts)
+        if how == "absolute":
+            difference = "alt.value - base.value"
+        elif how == "percent":
+            difference = "100 * (alt.value - base.value) / NULLIF(base.value, 0)"
+        else:
+            raise ValueError(f"expected one of ('absolute', 'percent'), got {how=}")
+        if (by is not None) and (by not in AGGREGATE_PERIODS):
+            raise ValueError(f"expected one of {tuple(AGGREGATE_PERIODS)}, got {by=}")
+        if agg not in AGGREGATE_FUNCTIONS:
+            raise ValueError(
+                f"expected one of {tuple(AGGREGATE_FUNCTIONS)}, got {agg=}"
+            )
+        if by is None:
+            keys = ["variable", "datetime"]
+            columns = "run, variable, datetime, CAST(value AS DOUBLE) AS value"
+        else:
+            keys = ["variable"]
+            columns = "run, variable"
+            if AGGREGATE_PERIODS[by] is not None:
+                keys.append(by)
+                columns += f", {AGGREGATE_PERIODS[by]} AS {by}"
+            columns += f", CAST({AGGREGATE_FUNCTIONS[agg]}(value) AS DOUBLE) AS value"
+        where, params = self._results_filter([base, *alts], variables, start, end)
+        group = "GROUP BY ALL" if by is not None else ""
+        keys = ", ".join(keys)
+        q = f"""WITH
+                series AS (
+                    SELECT {columns}
+                    FROM {self._results_source()}
+                    {where}
+                    {group}
+                )
+            SELECT
+                alt.run AS run,
+                {keys},
+                base.value AS base,
+                alt.value AS alt,
+                {difference} AS difference,
+            FROM series AS alt
+            JOIN series AS base USING ({keys})
+            WHERE base.run = ? AND list_contains(?, alt.run)
+            ORDER BY run, {keys};"""
+        params.extend([base, alts])
+        with self._connect(read_only=True) as conn:
+            self._get_runs(conn, [base, *alts])
+            return self._fetch(conn, q, params, output)
+
+    def export_parquet(
+        self,
+        dst: Path | str,
+        runs: str | Iterable[str] | None = None,
+        overwrite: bool = False,
+    ) -> pd.DataFrame:
+        """Export the results to a directory of Hive-partitioned Parquet files.
+
+        The results are written with the names of their run and variable, one
+        directory per run and variable kind (`result/run=.../variable_kind=...`),
+        sorted by variable and date. The run and variable tables are written next to
+        them, as `run.parquet` and `variable.parquet`. The dataset can be read with
+        `csdb.ParquetClient`, or any tool that reads Parquet.
+
+        Parameters
+        ----------
+        dst : Path | str
+            The directory to write the dataset to
+        runs : str | Iterable[str] | None, optional
+            The runs to export, by default every run
+        overwrite : bool, optional
+            Replace the results already in `dst`, by default False
+
+        Returns
+        -------
+        pd.DataFrame
+            The statistics of each result file written: its `filename`, the `count`
+            of rows, the `file_size_bytes`, the min, max and null count of each
+            column in `column_statistics`, and its `partition_keys`
+
+        Raises
+        ------
+        duckdb.IOException
+            Raised if `dst` already has results and `overwrite` is False
+        ValueError
+            Raised if any of the `runs` aren't in the database
+
+        Example
+        -------
+            >>> import csdb
+            >>> client = csdb.Client("file.db")
+            >>> stats = client.export_parquet("study", runs=["BASE", "ALT1"])
+            >>> client = csdb.ParquetClient("study")
+            >>> run, variables, df = client.get_result_by_run("ALT1")
+        """
+        dst = Path(dst)
+        if runs is not None:
+            runs = [runs] if isinstance(runs, str) else list(runs)
+        where, params = self._results_filter(runs=runs)
+        # COPY can't bind the destination as a parameter
+        partitions = ", ".join(PARQUET_PARTITIONS)
+        options = f"FORMAT parquet, PARTITION_BY ({partitions}), RETURN_STATS true"
+        if overwrite:
+            options += ", OVERWRITE true"
+        result_dir = dst / PARQUET_RESULT_DIR
+        if (not overwrite) and result_dir.exists() and any(result_dir.iterdir()):
+            # checked before anything is written, so the dataset is left as it was
+            raise duckdb.IOException(
+                f"{result_dir} already has results, use overwrite=True to replace them"
+            )
+        with self._connect(read_only=True) as conn:
+            if runs is not None:
+                self._get_runs(conn, runs)
+            dst.mkdir(parents=True, exist_ok=True)
+            logger.info(f"exporting results to {dst}")
+            # the results are written first, and the tables that describe them only
+            # once the results have been written
+            stats = self._fetch(
+                conn,
+                f"""COPY (
+                    SELECT
+                        run,
+                        kind AS variable_kind,
+                        variable,
+                        datetime,
+                        value,
+                    FROM {self._results_source()}
+                    {where}
+                    ORDER BY run, variable_kind, variable, datetime
+                )
+                TO {_quote_literal(result_dir)} ({options});""",
+                params,
+            )
+            self._execute(
+                conn,
+                f"""COPY (
+                    SELECT * FROM run
+                    WHERE ? IS NULL OR list_contains(?, name)
+                    ORDER BY id
+                )
+                TO {_quote_literal(dst / "run.parquet")} (FORMAT parquet);""",
+                [runs, runs],
+            )
+            self._execute(
+                conn,
+                f"""COPY (SELECT * FROM variable ORDER BY id)
+                TO {_quote_literal(dst / "variable.parquet")} (FORMAT parquet);""",
+            )
+        return stats
@@ -0,0 +1,11 @@
+CREATE TABLE IF NOT EXISTS run_source (
+        run_id INTEGER NOT NULL,
+        source VARCHAR NOT NULL,
+        size BIGINT NOT NULL,
+        mtime DOUBLE NOT NULL,
+        digest VARCHAR NOT NULL,
+        variables VARCHAR NOT NULL,
+        code_names VARCHAR[] NOT NULL,
+        PRIMARY KEY (run_id, source),
+        FOREIGN KEY(run_id) REFERENCES run (id)
+);
@@ -0,0 +1,13 @@
+CREATE TABLE IF NOT EXISTS dss_catalog (
+        source VARCHAR NOT NULL,
+        size BIGINT NOT NULL,
+        mtime DOUBLE NOT NULL,
+        ordinal INTEGER NOT NULL,
+        a VARCHAR NOT NULL,
+        b VARCHAR NOT NULL,
+        c VARCHAR NOT NULL,
+        d VARCHAR NOT NULL,
+        e VARCHAR NOT NULL,
+        f VARCHAR NOT NULL,
+        record_type INTEGER NOT NULL
+);
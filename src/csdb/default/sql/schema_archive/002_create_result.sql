@@ -0,0 +1,7 @@
+CREATE TABLE IF NOT EXISTS result (
+        datetime DATE NOT NULL, 
+        value FLOAT NOT NULL, 
+        run_id INTEGER NOT NULL, 
+        variable_id INTEGER NOT NULL
+);
+CREATE SEQUENCE seq_result START 1;
\ No newline at end of file
@@ -0,0 +1,36 @@
+CREATE TABLE IF NOT EXISTS series (
+        run_id INTEGER NOT NULL, 
+        variable_id INTEGER NOT NULL, 
+        start DATE NOT NULL, 
+        step INTERVAL NOT NULL, 
+        value FLOAT[] NOT NULL, 
+        PRIMARY KEY (run_id, variable_id), 
+        FOREIGN KEY(run_id) REFERENCES run (id), 
+        FOREIGN KEY(variable_id) REFERENCES variable (id)
+);
+CREATE SEQUENCE seq_result START 1;
+CREATE VIEW result AS
+SELECT
+        s.datetime AS datetime,
+        s.value AS value,
+        s.run_id AS run_id,
+        s.variable_id AS variable_id
+FROM (
+        SELECT
+                series.run_id,
+                series.variable_id,
+                unnest(series.value) AS value,
+                unnest(list_slice(
+                        calendar.dates,
+                        datediff('month', DATE '1700-01-31', series.start) + 1,
+                        datediff('month', DATE '1700-01-31', series.start) + len(series.value)
+                )) AS datetime
+        FROM series, (
+                SELECT list(
+                        CAST(last_day(DATE '1700-01-01' + to_months(CAST(i AS INTEGER))) AS DATE)
+                        ORDER BY i
+                ) AS dates
+                FROM range(12 * 700) AS months(i)
+        ) AS calendar
+) AS s
+WHERE s.value IS NOT NULL;
@@ -0,0 +1,158 @@
+import logging
+from pathlib import Path
+from typing import Iterable, Mapping
+
+import duckdb
+
+from .client import Client, _quote_literal
+
+logger = logging.getLogger(__name__)
+
+
+class FederatedClient(Client):
+    """`csdb.FederatedClient` reads many csdb databases as if they were one.
+
+    Each database is attached read-only to an in-memory database, as a study. The
+    `run`, `variable` and `result` views union the tables of every study, and the
+    read methods of `csdb.Client` work the same way across them, each query running
+    as one DuckDB query over all of the files.
+
+    Runs are named `<study>/<run>`, so that the runs with the same name in different
+    studies can be told apart, and the `run` and `result` views have a `study`
+    column. A variable defined by more than one study is described by the first
+    study that has it. The databases are read-only, and the write methods raise an
+    error.
+
+    Parameters
+    ----------
+    studies : Mapping[str, Path | str] | Iterable[Path | str]
+        The databases to read, by the name of their study. If only the paths are
+        given, each study is named for the stem of its file.
+    cache_size : int | None, optional
+        The size of the result cache, see `csdb.Client`, by default None
+
+    Raises
+    ------
+    ValueError
+        Raised if no databases are given, or the study names are repeated or have a
+        "/" in them
+    FileNotFoundError
+        Raised if one of the databases doesn't exist
+
+    Example
+    -------
+        >>> import csdb
+        >>> client = csdb.FederatedClient({"2020": "study_2020.db", "2024": "study_2024.db"})
+        >>> df = client.compare_runs(base="2020/BASE", alts=["2024/BASE"], by="water_year")
+    """
+
+    def __init__(
+        self,
+        studies: Mapping[str, Path | str] | Iterable[Path | str],
+        cache_size: int | None = None,
+    ):
+        if isinstance(studies, Mapping):
+            items = [(str(name), Path(src)) for name, src in studies.items()]
+        else:
+            items = [(Path(src).stem, Path(src)) for src in studies]
+        names = [name for name, _ in items]
+        if not items:
+            raise ValueError("expected at least one database, got none")
+        if len(set(names)) != len(names):
+            raise ValueError(f"expected unique study names, got {names}")
+        invalid = [name for name in names if (not name) or ("/" in name)]
+        if invalid:
+            raise ValueError(f"study names can't be empty or have a '/': {invalid}")
+        missing = [str(src) for _, src in items if not src.exists()]
+        if missing:
+            raise FileNotFoundError(f"databases not found: {missing}")
+        self.__studies = {name: src.resolve() for name, src in items}
+        super().__init__(items[0][1], fill_vars_if_new=False, cache_size=cache_size)
+
+    @property
+    def studies(self) -> dict[str, Path]:
+        """The path of each database, by the name of its study."""
+        return dict(self.__studies)
+
+    def _new_connection(self, read_only: bool) -> duckdb.DuckDBPyConnection:
+        # An in-memory database, with each study attached under an alias, and views
+        # of the union of their tables in place of the tables
+        conn = duckdb.connect()
+        runs = list()
+        variables = list()
+        results = list()
+        for i, (name, src) in enumerate(self.__studies.items()):
+            logger.debug(f"attaching study {name}: {src}")
+            alias = f"study_{i}"
+            conn.execute(f"ATTACH {_quote_literal(src)} AS {alias} (READ_ONLY);")
+            study = _quote_literal(name)
+            runs.append(
+                f"""SELECT
+                    (CAST({i} AS BIGINT) << 32) | id AS id,
+                    {study} || '/' || name AS name,
+                    source,
+                    {study} AS study,
+                FROM {alias}.run"""
+            )
+            variables.append(
+                f"""SELECT {i} AS study_order, name, code_name, kind, units
+                FROM {alias}.variable"""
+            )
+            results.append(
+                f"""SELECT
+                    result.datetime,
+                    result.value,
+                    (CAST({i} AS BIGINT) << 32) | result.run_id AS run_id,
+                    variable.code_name,
+                    {study} AS study,
+                FROM {alias}.result
+                JOIN {alias}.variable ON result.variable_id = variable.id"""
+            )
+        conn.execute(f"CREATE VIEW run AS {' UNION ALL '.join(runs)};")
+        conn.execute(
+            f"""CREATE VIEW variable AS
+            SELECT
+                row_number() OVER (ORDER BY code_name) AS id,
+                name,
+                code_name,
+                kind,
+                units,
+            FROM (
+                SELECT DISTINCT ON (code_name) *
+                FROM ({' UNION ALL '.join(variables)})
+                ORDER BY code_name, study_order
+            );"""
+        )
+        conn.execute(
+            f"""CREATE VIEW result AS
+            SELECT r.datetime, r.value, r.run_id, variable.id AS variable_id, r.study
+            FROM ({' UNION ALL '.join(results)}) AS r
+            JOIN variable ON r.code_name = variable.code_name;"""
+        )
+        return conn
+
+    def _connect(self, read_only: bool = True):
+        if not read_only:
+            raise duckdb.InvalidInputException("the studies are attached read-only")
+        return super()._connect(read_only=True)
+
+    def _results_source(self) -> str:
+        # The results of each study are joined to their names in their own database,
+        # so the filters on the names are pushed into each study's scan
+        sources = list()
+        for i, name in enumerate(self.__studies):
+            alias = f"study_{i}"
+            study = _quote_literal(name)
+            sources.append(
+                f"""SELECT
+                    {study} || '/' || run.name AS run,
+                    variable.code_name AS variable,
+                    variable.kind AS kind,
+                    result.datetime AS datetime,
+                    result.value AS value,
+                    {study} AS study,
+                FROM {alias}.result
+                JOIN {alias}.run ON result.run_id = run.id
+                JOIN {alias}.variable ON result.variable_id = variable.id"""
+            )
+        return f"({' UNION ALL '.join(sources)})"
@@ -1,8 +1,13 @@
+import hashlib
 import logging
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
 from pathlib import Path
-from typing import Any, Collection, Iterator
+from typing import Any, Collection, Iterable, Iterator, Mapping, NamedTuple
 
 import hecdss  # for dss 7
+import numpy as np
 import pandas as pd
 import yaml
 from hecdss.record_type import RecordType
@@ -31,6 +36,56 @@ def load_yaml(src: Path) -> Any:
     return obj
 
 
+class FileFingerprint(NamedTuple):
+    """The identity of a source file, used to tell if it changed between reads."""
+
+    size: int
+    """The size of the file in bytes"""
+    mtime: float
+    """The modification time of the file, as a POSIX timestamp"""
+    digest: str
+    """The blake2b hash of the file contents"""
+
+
+def hash_file(src: Path | str, block_size: int = 2**20) -> str:
+    """Hash the contents of a file with blake2b, reading it in blocks.
+
+    Parameters
+    ----------
+    src : Path | str
+        The file to hash
+    block_size : int, optional
+        The number of bytes read at a time, by default 1 MiB
+
+    Returns
+    -------
+    str
+        The hex digest of the file contents
+    """
+    h = hashlib.blake2b()
+    with open(src, "rb") as SRC:
+        while block := SRC.read(block_size):
+            h.update(block)
+    return h.hexdigest()
+
+
+def get_file_fingerprint(src: Path | str) -> FileFingerprint:
+    """Get the size, modification time, and content hash of a file.
+
+    Parameters
+    ----------
+    src : Path | str
+        The file to fingerprint
+
+    Returns
+    -------
+    FileFingerprint
+        The fingerprint of the file
+    """
+    stat = Path(src).stat()
+    return FileFingerprint(stat.st_size, stat.st_mtime, hash_file(src))
+
+
 def get_dss_file_version(src: Path | str) -> tuple[int, str]:
     """Determine the version of the DSS file.
 
@@ -66,21 +121,208 @@ def get_dss_file_version(src: Path | str) -> tuple[int, str]:
     return major_version, file_version
 
 
-def _iter_load_dss_7(
-    src: Path | str,
-    paths: Collection[hecdss.DssPath] | None = None,
-) -> Iterator[pd.Series]:
-    src = Path(src).absolute()
-    if paths is None:
-        with hecdss.HecDss(str(src)) as DSS:
-            catalog = DSS.get_catalog()
-            paths = list(catalog.items)
+class _LedgerBuilder:
+    """Collects timeseries into flat arrays, in the ledger format.
+
+    The datetimes, variable codes, and values of each series are copied into
+    pre-allocated NumPy arrays as the series are added, so the long DataFrame is built
+    in one pass, without a wide intermediate. If the number of series is known, the
+    arrays are sized from the length of the first series, otherwise they grow as they
+    fill up.
+    """
+
+    def __init__(self, expected_series: int | None = None):
+        self._expected_series = expected_series
+        self._datetime = np.empty(0, dtype="datetime64[ns]")
+        self._code = np.empty(0, dtype=np.int32)
+        self._value = np.empty(0, dtype=np.float64)
+        self._names: list[str] = list()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def series_count(self) -> int:
+        return len(self._names)
+
+    def _reserve(self, n: int):
+        capacity = len(self._value)
+        if self._size + n <= capacity:
+            return
+        remaining = (self._expected_series or 0) - self.series_count
+        if remaining > 0:
+            # assume the rest of the series are as long as this one
+            capacity = self._size + n * remaining
+        else:
+            capacity = max(2 * capacity, self._size + n)
+        for attr in ("_datetime", "_code", "_value"):
+            old: np.ndarray = getattr(self, attr)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[: self._size] = old[: self._size]
+            setattr(self, attr, new)
+
+    def append(self, s: pd.Series):
+        values = s.to_numpy(dtype=np.float64)
+        keep = ~np.isnan(values)  # missing values aren't kept in the ledger
+        n = int(keep.sum())
+        self._reserve(n)
+        i, j = self._size, self._size + n
+        self._datetime[i:j] = pd.DatetimeIndex(s.index).to_numpy("datetime64[ns]")[keep]
+        self._code[i:j] = len(self._names)
+        self._value[i:j] = values[keep]
+        self._names.append(str(s.name))
+        self._size = j
+
+    def build(self) -> pd.DataFrame:
+        names = np.asarray(self._names, dtype=object)
+        # an explicit dtype stops pandas from scanning the strings to infer one
+        variable = pd.Series(names[self._code[: self._size]], dtype=object, copy=False)
+        return pd.DataFrame(
+            {
+                "datetime": self._datetime[: self._size],
+                "variable": variable,
+                "value": self._value[: self._size],
+            },
+            copy=False,
+        )
+
+
+def _series_to_ledger(
+    frames: Iterable[pd.Series],
+    expected_series: int | None = None,
+) -> pd.DataFrame:
+    # Write each series directly into the ledger format, skipping the wide table
+    builder = _LedgerBuilder(expected_series)
+    for s in frames:
+        builder.append(s)
+    return builder.build()
 
-    with hecdss.HecDss(str(src)) as DSS:
+
+class DssReader:
+    """Read timeseries from a DSS file, opening the file and its catalog only once.
+
+    The file version is determined when the reader is created, and the file is opened
+    when the reader is used as a context manager (or `open` is called). The catalog is
+    read the first time it's needed, and re-used for every call after that, so finding
+    intersecting paths and then reading them only pays for the file once. The reader
+    works with both DSS 6 and DSS 7.
+
+    Parameters
+    ----------
+    src : Path | str
+        The DSS source file.
+    catalog : list[hecdss.DssPath] | None, optional
+        The catalog of the file, if it is already known, by default None
+
+    Example
+    -------
+        >>> from csdb.io import DssReader
+        >>> with DssReader("file.dss") as reader:
+        ...     paths = reader.get_intersecting_catalog(["S_OROVL", "C_CAA003"])
+        ...     df = reader.load(paths)
+
+    Raises
+    ------
+    NotImplementedError
+        Raised when the version of the DSS file isn't supported or cannot be determined
+    """
+
+    def __init__(
+        self,
+        src: Path | str,
+        catalog: list[hecdss.DssPath] | None = None,
+    ):
+        self.src = Path(src).absolute()
+        self.major_version, self.file_version = get_dss_file_version(self.src)
+        if self.major_version not in (6, 7):
+            raise NotImplementedError(
+                f"DSS version not supported: file_version={self.file_version!r}"
+            )
+        self._catalog = catalog
+        self._dss: hecdss.HecDss | HecDss_6.Open | None = None
+
+    def __enter__(self) -> "DssReader":
+        return self.open()
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def open(self) -> "DssReader":
+        """Open the DSS file, does nothing if the file is already open."""
+        if self._dss is None:
+            logger.debug(f"opening DSS file: {self.src}")
+            if self.major_version == 7:
+                self._dss = hecdss.HecDss(str(self.src))
+            else:
+                self._dss = HecDss_6.Open(str(self.src))
+        return self
+
+    def close(self) -> None:
+        """Close the DSS file, does nothing if the file isn't open."""
+        if self._dss is not None:
+            self._dss.close()
+            self._dss = None
+
+    @property
+    def dss(self) -> hecdss.HecDss | HecDss_6.Open:
+        """The open DSS file object, opening the file if it isn't open yet."""
+        if self._dss is None:
+            self.open()
+        return self._dss  # type: ignore
+
+    @property
+    def catalog(self) -> list[hecdss.DssPath]:
+        """The full catalog of the DSS file, read once and then re-used."""
+        if self._catalog is None:
+            logger.debug(f"reading catalog of {self.src}")
+            if self.major_version == 7:
+                self._catalog = list(self.dss.get_catalog().items)
+            else:
+                self._catalog = [
+                    hecdss.DssPath(path=p, recType=RecordType.RegularTimeSeries.value)
+                    for p in self.dss.getPathnameList("/*/*/*/*/*/*/")
+                ]
+        return self._catalog
+
+    def get_intersecting_catalog(
+        self,
+        b_parts: Collection[str],
+    ) -> list[hecdss.DssPath]:
+        """Find the paths in the catalog that have the B-parts given.
+
+        The paths that are returned don't retain their D-parts (dates) for DSS 6 files.
+
+        Parameters
+        ----------
+        b_parts : list[str]
+            The list of B-parts to find within the DSS file.
+
+        Returns
+        -------
+        list[hecdss.DssPath]
+            The list of full DSS Paths (with wildcard D-part).
+        """
+        logger.debug(f"finding a maximun of {len(b_parts)} intersecting paths")
+        b_parts = {b.lower() for b in b_parts}
+        if self.major_version == 7:
+            found = [p for p in self.catalog if p.B.lower() in b_parts]
+        else:
+            found = list()
+            seen_b = set()
+            for p in self.catalog:
+                if (p.B in seen_b) or (p.B.lower() not in b_parts):
+                    continue
+                found.append(p.path_without_date())
+                seen_b.add(p.B)
+        logger.debug(f"found {len(found)} intersecting paths")
+        return found
+
+    def _iter_series_7(self, paths: Collection[hecdss.DssPath]) -> Iterator[pd.Series]:
         total = len(paths)
         for i, path in enumerate(paths):
             logger.info(f"reading {i+1}/{total}: {path}")
-            rts = DSS.get(str(path))
+            rts = self.dss.get(str(path))
             if isinstance(rts, hecdss.RegularTimeSeries):
                 s = pd.Series(
                     data=rts.values,
@@ -103,25 +345,11 @@ def _iter_load_dss_7(
                     + " expected hecdss.RegularTimeSeries"
                 )
 
-
-def _iter_load_dss_6(
-    src: Path | str,
-    paths: Collection[hecdss.DssPath] | None = None,
-) -> Iterator[pd.Series]:
-    src = Path(src).absolute()
-    DSS: HecDss_6.Open
-    if paths is None:
-        with HecDss_6.Open(str(src)) as DSS:
-            paths = [
-                hecdss.DssPath(path=p, recType=RecordType.RegularTimeSeries.value)
-                for p in DSS.getPathnameList("/*/*/*/*/*/*/")
-            ]
-
-    with HecDss_6.Open(str(src)) as DSS:
+    def _iter_series_6(self, paths: Collection[hecdss.DssPath]) -> Iterator[pd.Series]:
         total = len(paths)
         for i, path in enumerate(paths):
             logger.info(f"reading {i+1}/{total}: {path}")
-            rts: RegularTimeSeries = DSS.read_ts(
+            rts: RegularTimeSeries = self.dss.read_ts(
                 str(path),
                 trim_missing=True,
             )  # type: ignore
@@ -135,6 +363,154 @@ def _iter_load_dss_6(
             s.index = s.index - pd.Timedelta(days=1)  # type: ignore
             yield s
 
+    def iter_series(
+        self,
+        paths: Collection[hecdss.DssPath] | None = None,
+    ) -> Iterator[pd.Series]:
+        """Iterate over the timeseries in the file, one `pandas.Series` at a time.
+
+        Each series is named with the B-part of its path, and is indexed by the
+        end-of-period datetime.
+
+        Parameters
+        ----------
+        paths : list[hecdss.DssPath], optional
+            The DSS paths that should be read from the file, if not provided all paths
+            in the catalog will be read, by default None
+
+        Yields
+        ------
+        Iterator[pd.Series]
+            The timeseries read from the file
+        """
+        if paths is None:
+            paths = self.catalog
+        if self.major_version == 7:
+            yield from self._iter_series_7(paths)
+        else:
+            yield from self._iter_series_6(paths)
+
+    def iter_chunks(
+        self,
+        paths: Collection[hecdss.DssPath] | None = None,
+        chunk_size: int = 50,
+    ) -> Iterator[pd.DataFrame]:
+        """Load the file in chunks of timeseries, as tidy DataFrames.
+
+        Each chunk has the same format as the result of `load`, but holds at most
+        `chunk_size` timeseries.
+
+        Parameters
+        ----------
+        paths : list[hecdss.DssPath], optional
+            The DSS paths that should be read from the file, if not provided all paths
+            in the catalog will be read, by default None
+        chunk_size : int, optional
+            The maximum number of timeseries in each chunk, by default 50
+
+        Yields
+        ------
+        Iterator[pd.DataFrame]
+            Tidy DataFrames of the data read from the file
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size=}")
+        builder = _LedgerBuilder(chunk_size)
+        for series in self.iter_series(paths):
+            builder.append(series)
+            if builder.series_count == chunk_size:
+                yield builder.build()
+                builder = _LedgerBuilder(chunk_size)
+        if builder.series_count:
+            yield builder.build()
+
+    def load(
+        self,
+        paths: Collection[hecdss.DssPath] | None = None,
+    ) -> pd.DataFrame:
+        """Load the timeseries in the file into a tidy DataFrame.
+
+        The result will be a tidy DataFrame with columns: 'datetime', 'variable', and
+        'value'.
+
+        Parameters
+        ----------
+        paths : list[hecdss.DssPath], optional
+            The DSS paths that should be read from the file, if not provided all paths
+            in the catalog will be read, by default None
+
+        Returns
+        -------
+        pd.DataFrame
+            A tidy DataFrame of the data read from the file
+        """
+        # datetime   | variable  | value
+        # YYYY-MM-DD | "S_OROVL" | XXXX.XX
+        if paths is None:
+            paths = self.catalog
+        return _series_to_ledger(self.iter_series(paths), expected_series=len(paths))
+
+
+def iter_load_dss(
+    src: Path | str,
+    paths: Collection[hecdss.DssPath] | None = None,
+) -> Iterator[pd.Series]:
+    """Iterate over the timeseries in a DSS file, one `pandas.Series` at a time.
+
+    Works with both DSS 6 and DSS 7. Each series is named with the B-part of its path,
+    and is indexed by the end-of-period datetime.
+
+    Parameters
+    ----------
+    src : Path
+        The DSS source file.
+    paths : list[hecdss.DssPath], optional
+        The DSS paths that should be read from the file, if not provided all paths will
+        be read from the file, by default None
+
+    Yields
+    ------
+    Iterator[pd.Series]
+        The timeseries read from the file
+
+    Raises
+    ------
+    NotImplementedError
+        Raised when the version of the DSS file isn't supported or cannot be determined
+    """
+    with DssReader(src) as reader:
+        yield from reader.iter_series(paths)
+
+
+def iter_load_dss_chunks(
+    src: Path | str,
+    paths: Collection[hecdss.DssPath] | None = None,
+    chunk_size: int = 50,
+) -> Iterator[pd.DataFrame]:
+    """Load a DSS file in chunks of timeseries, as tidy DataFrames.
+
+    Each chunk has the same format as the result of `load_dss`, but holds at most
+    `chunk_size` timeseries, so the memory used is bounded by the chunk size rather
+    than by the size of the file.
+
+    Parameters
+    ----------
+    src : Path
+        The DSS source file.
+    paths : list[hecdss.DssPath], optional
+        The DSS paths that should be read from the file, if not provided all paths will
+        be read from the file, by default None
+    chunk_size : int, optional
+        The maximum number of timeseries in each chunk, by default 50
+
+    Yields
+    ------
+    Iterator[pd.DataFrame]
+        Tidy DataFrames of the data read from the file
+    """
+    with DssReader(src) as reader:
+        yield from reader.iter_chunks(paths, chunk_size)
+
 
 def load_dss(
     src: Path | str,
@@ -163,63 +539,8 @@ def load_dss(
     NotImplementedError
         Raised when the version of the DSS file isn't supported or cannot be determined
     """
-    frames = list()
-    major, file_version = get_dss_file_version(src)
-    if major == 7:
-        for series in _iter_load_dss_7(src, paths):
-            frames.append(series)
-    elif major == 6:
-        for series in _iter_load_dss_6(src, paths):
-            frames.append(series)
-    else:
-        raise NotImplementedError(f"DSS version not supported: {file_version=}")
-    df = pd.concat(frames, axis=1)
-    df.index.name = "datetime"
-    df.index = pd.to_datetime(df.index)
-    # convert the dss table into the ledger format we expect
-    # datetime   | variable  | value   | run
-    # YYYY-MM-DD | "S_OROVL" | XXXX.XX | "XXXX"
-    df_ledger = (
-        df.melt(
-            value_name="value",
-            var_name="variable",
-            ignore_index=False,
-        )
-        .dropna()  # NAs exist in the df becasue of date mis-alignment.
-        .reset_index()  # Make datetime a regular column
-    )
-    return df_ledger
-
-
-def _get_intersecting_catalog_7(
-    dss: Path | str,
-    b_parts: Collection[str],
-) -> list[hecdss.DssPath]:
-    with hecdss.HecDss(str(dss)) as DSS:
-        catalog = DSS.get_catalog()
-        paths: list[hecdss.DssPath] = list(catalog.items)
-    paths = [p for p in paths if p.B.lower() in b_parts]
-    return paths
-
-
-def _get_intersecting_catalog_6(
-    dss: Path | str,
-    b_parts: Collection[str],
-) -> list[hecdss.DssPath]:
-    DSS: HecDss_6.Open
-    with HecDss_6.Open(str(dss)) as DSS:
-        paths_with_duplicates = [
-            hecdss.DssPath(path=p) for p in DSS.getPathnameList("/*/*/*/*/*/*/")
-        ]
-    paths = list()
-    seen_b = list()
-    for p in paths_with_duplicates:
-        if (p.B in seen_b) or (p.B.lower() not in b_parts):
-            continue
-        paths.append(p.path_without_date())
-        seen_b.append(p.B)
-
-    return paths
+    with DssReader(src) as reader:
+        return reader.load(paths)
 
 
 def get_intersecting_catalog(
@@ -249,14 +570,113 @@ def get_intersecting_catalog(
     NotImplementedError
         Raised when the version of the DSS file isn't supported or cannot be determined.
     """
-    logger.debug(f"finding a maximun of {len(b_parts)} intersecting paths in {dss=}")
-    b_parts = [b.lower() for b in b_parts]
-    major, file_version = get_dss_file_version(dss)
-    if major == 7:
-        found = _get_intersecting_catalog_7(dss, b_parts)
-    elif major == 6:
-        found = _get_intersecting_catalog_6(dss, b_parts)
-    else:
-        raise NotImplementedError(f"DSS version not supported: {file_version=}")
-    logger.debug(f"found {len(found)} intersecting paths")
-    return found
+    logger.debug(f"finding intersecting paths in {dss=}")
+    with DssReader(dss) as reader:
+        return reader.get_intersecting_catalog(b_parts)
+
+
+def load_intersecting_dss(
+    src: Path | str,
+    b_parts: Collection[str],
+    catalog: list[hecdss.DssPath] | None = None,
+) -> tuple[pd.DataFrame, list[hecdss.DssPath]]:
+    """Load the data in a DSS file for the paths that intersect with the B-parts given.
+
+    This combines `get_intersecting_catalog` and `load_dss` using a single `DssReader`,
+    and is a module level function so that it can be sent to worker processes.
+
+    Parameters
+    ----------
+    src : Path | str
+        The DSS source file.
+    b_parts : Collection[str]
+        The B-parts to read from the DSS file.
+    catalog : list[hecdss.DssPath] | None, optional
+        The catalog of the file, if it is already known, by default None
+
+    Returns
+    -------
+    tuple[pd.DataFrame, list[hecdss.DssPath]]
+        A tidy DataFrame of the data read from the file, and the catalog of the file
+    """
+    with DssReader(src, catalog=catalog) as reader:
+        df = reader.load(reader.get_intersecting_catalog(b_parts))
+        return df, reader.catalog
+
+
+def iter_load_intersecting_dss(
+    srcs: Iterable[Path | str],
+    b_parts: Collection[str],
+    max_workers: int | None = None,
+    ordered: bool = True,
+    catalogs: Mapping[Path, list[hecdss.DssPath] | None] | None = None,
+) -> Iterator[tuple[Path, pd.DataFrame, list[hecdss.DssPath]]]:
+    """Load many DSS files, decoding them in a pool of worker processes.
+
+    The files are read with `load_intersecting_dss` in worker processes, and the
+    results are yielded back to the calling process one file at a time. At most two
+    files per worker are in flight at once, so the memory used is bounded by the number
+    of workers rather than the number of files.
+
+    Parameters
+    ----------
+    srcs : Iterable[Path | str]
+        The DSS files to read.
+    b_parts : Collection[str]
+        The B-parts to read from each DSS file.
+    max_workers : int | None, optional
+        The number of worker processes to use, if None the number of CPUs is used. If
+        1, the files are read in the calling process, by default None
+    ordered : bool, optional
+        If True, the files are yielded in the order they were given. If False, they are
+        yielded as soon as they are read, by default True
+    catalogs : Mapping[Path, list[hecdss.DssPath] | None] | None, optional
+        The catalogs of the files that are already known, by default None
+
+    Yields
+    ------
+    Iterator[tuple[Path, pd.DataFrame, list[hecdss.DssPath]]]
+        The source file, the tidy DataFrame of the data read from it, and its catalog
+    """
+    srcs = [Path(src) for src in srcs]
+    b_parts = list(b_parts)
+    if catalogs is None:
+        catalogs = dict()
+    if max_workers == 1:
+        for src in srcs:
+            yield src, *load_intersecting_dss(src, b_parts, catalogs.get(src))
+        return
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    window = 2 * max_workers
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        pending: deque[tuple[Path, Future]] = deque()
+        queue = iter(srcs)
+
+        def submit():
+            while len(pending) < window:
+                src = next(queue, None)
+                if src is None:
+                    break
+                future = pool.submit(
+                    load_intersecting_dss,
+                    src,
+                    b_parts,
+                    catalogs.get(src),
+                )
+                pending.append((src, future))
+
+        submit()
+        while pending:
+            if ordered:
+                src, future = pending.popleft()
+            else:
+                wait([f for _, f in pending], return_when=FIRST_COMPLETED)
+                i = next(i for i, (_, f) in enumerate(pending) if f.done())
+                src, future = pending[i]
+                del pending[i]
+            df, catalog = future.result()
+            submit()
+            logger.info(f"read {src}")
+            yield src, df, catalog
@@ -0,0 +1,100 @@
+import logging
+from pathlib import Path
+
+import duckdb
+
+from .client import (
+    PARQUET_PARTITIONS,
+    PARQUET_RESULT_DIR,
+    PARQUET_TABLES,
+    Client,
+    _quote_literal,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ParquetClient(Client):
+    """`csdb.ParquetClient` reads a Parquet dataset written by `Client.export_parquet`.
+
+    The read methods of `csdb.Client` work the same way, but they scan the Parquet
+    files instead of a database file. Filters on the run are answered from the
+    partition directories, so only the files of the runs that are asked for are read.
+    The dataset is read-only, and the write methods raise an error.
+
+    Parameters
+    ----------
+    src : Path | str
+        The directory of the dataset.
+    cache_size : int | None, optional
+        The size of the result cache, see `csdb.Client`, by default None
+
+    Raises
+    ------
+    FileNotFoundError
+        Raised if `src` doesn't have the files of a dataset
+
+    Example
+    -------
+        >>> import csdb
+        >>> client = csdb.ParquetClient("study")
+        >>> df = client.query(runs=["BASE", "ALT1"], variables="S_OROVL", wide=True)
+    """
+
+    def __init__(self, src: Path | str, cache_size: int | None = None):
+        src = Path(src)
+        if not src.is_absolute():
+            src = Path(".").resolve() / src
+        expected = [src / f"{table}.parquet" for table in PARQUET_TABLES]
+        expected.append(src / PARQUET_RESULT_DIR)
+        missing = [str(path) for path in expected if not path.exists()]
+        if missing:
+            raise FileNotFoundError(f"not a csdb parquet dataset, missing: {missing}")
+        self.__dataset = src
+        super().__init__(src, fill_vars_if_new=False, cache_size=cache_size)
+
+    def _new_connection(self, read_only: bool) -> duckdb.DuckDBPyConnection:
+        # An in-memory database, with views of the dataset in place of the tables
+        logger.debug(f"connecting to parquet dataset: {self.__dataset}")
+        conn = duckdb.connect()
+        for table in PARQUET_TABLES:
+            path = _quote_literal(self.__dataset / f"{table}.parquet")
+            conn.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet({path});")
+        conn.execute(
+            f"""CREATE VIEW result AS
+            SELECT
+                r.datetime AS datetime,
+                r.value AS value,
+                run.id AS run_id,
+                variable.id AS variable_id,
+            FROM {self._results_source()} AS r
+            JOIN run ON r.run = run.name
+            JOIN variable ON r.variable = variable.code_name;"""
+        )
+        return conn
+
+    def _connect(self, read_only: bool = True):
+        if not read_only:
+            raise duckdb.InvalidInputException(
+                f"the parquet dataset is read-only: {self.__dataset}"
+            )
+        return super()._connect(read_only=True)
+
+    def _results_source(self) -> str:
+        # Scanning the files directly, rather than through the result view, lets
+        # duckdb prune the partitions by the run and kind of variable
+        files = _quote_literal(self.__dataset / PARQUET_RESULT_DIR / "**" / "*.parquet")
+        types = ", ".join(f"'{key}': VARCHAR" for key in PARQUET_PARTITIONS)
+        return f"""(
+            SELECT
+                run,
+                variable,
+                variable_kind AS kind,
+                datetime,
+                value,
+            FROM read_parquet(
+                {files},
+                hive_partitioning = true,
+                hive_types = {{{types}}}
+            )
+        )"""
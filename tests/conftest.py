@@ -1,10 +1,40 @@
 import json
 import tempfile
 from pathlib import Path
-from typing import Generator
+from typing import Callable, Generator, Iterable, Mapping
 
+import pandas as pd
 import pytest
 
+import csdb
+
+
+def _make_run_frame(
+    run: str,
+    code_names: list[str],
+    periods: int = 12,
+    value: float | None = None,
+) -> pd.DataFrame:
+    # Monthly results for each variable, numbered i + 10 * j for the i-th month of
+    # the j-th variable unless a single value is given
+    dates = pd.date_range("1921-10-31", periods=periods, freq="ME")
+    frames = [
+        pd.DataFrame(
+            {
+                "run": run,
+                "datetime": dates,
+                "variable": code_name,
+                "value": (
+                    [float(i + 10 * j) for i in range(periods)]
+                    if value is None
+                    else value
+                ),
+            }
+        )
+        for j, code_name in enumerate(code_names)
+    ]
+    return pd.concat(frames, ignore_index=True)
+
 
 @pytest.fixture(scope="session")
 def assets_dir() -> Path:
@@ -20,6 +50,33 @@ def temp_database_path(
     yield p
 
 
+@pytest.fixture(scope="session")
+def make_run_frame() -> Callable[..., pd.DataFrame]:
+    return _make_run_frame
+
+
+@pytest.fixture(scope="function")
+def client_with_variables(temp_database_path: Path) -> Callable[..., csdb.Client]:
+    # A new database with the given variables, by code name, or by code name and kind
+    def make(
+        variables: Iterable[str] | Mapping[str, str],
+        src: Path | None = None,
+        **kwargs,
+    ) -> csdb.Client:
+        if not isinstance(variables, Mapping):
+            variables = {code_name: "t" for code_name in variables}
+        client = csdb.Client(
+            src or temp_database_path, fill_vars_if_new=False, **kwargs
+        )
+        for code_name, kind in variables.items():
+            client.put_variable(
+                name=code_name, code_name=code_name, kind=kind, units="t"
+            )
+        return client
+
+    return make
+
+
 @pytest.fixture(scope="session")
 def calculated_values(assets_dir: Path) -> dict[str, list]:
     f = assets_dir / "existing/calculated_values.json"
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+
+import csdb
+
+
+def test_async_client(
+    temp_database_path: Path,
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    code_names = ["S_OROVL", "S_SHSTA", "C_CAA003"]
+    run_names = [f"RUN{i}" for i in range(4)]
+    client_with_variables(code_names)
+
+    async def main():
+        async with csdb.AsyncClient(
+            temp_database_path,
+            max_workers=3,
+            fill_vars_if_new=False,
+        ) as client:
+            assert client.is_open
+            # the writes are serialized, even when they are started together
+            await asyncio.gather(
+                *(
+                    client.put_run_from_dataframe(r, make_run_frame(r, code_names))
+                    for r in run_names
+                )
+            )
+            # the event loop keeps running while the queries run on the pool
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0)
+
+            ticker = asyncio.create_task(tick())
+            results = await asyncio.gather(
+                *(client.get_result_by_variable(c) for c in code_names),
+                *(client.get_result_by_run(r) for r in run_names),
+            )
+            ticker.cancel()
+            counts = await client.get_variable_counts()
+        assert not client.is_open
+        return results, counts, ticks
+
+    results, counts, ticks = asyncio.run(main())
+    assert ticks > 0
+    for (runs, variable, df), code_name in zip(results, code_names):
+        assert variable.code_name == code_name
+        assert df.columns.tolist() == run_names
+    for (run, variables, df), run_name in zip(results[3:], run_names):
+        assert run.name == run_name
+        assert df.shape == (12, 3)
+    assert counts.to_dict() == {r: 3 for r in run_names}
+    assert not [t for t in threading.enumerate() if t.name.startswith("csdb")]
+
+
+def test_async_client_unopened(
+    temp_database_path: Path,
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    code_names = ["S_OROVL", "S_SHSTA"]
+    run_names = [f"RUN{i}" for i in range(3)]
+    base = client_with_variables(code_names)
+    base.put_run_from_dataframe("BASE", make_run_frame("BASE", code_names))
+    client = csdb.AsyncClient(temp_database_path, fill_vars_if_new=False)
+
+    async def main():
+        assert not client.is_open
+        # reads and writes at the same time, on the connection opened by the first
+        results = await asyncio.gather(
+            *(client.get_result_by_variable(c) for c in code_names * 2),
+            *(
+                client.put_run_from_dataframe(r, make_run_frame(r, code_names))
+                for r in run_names
+            ),
+        )
+        assert client.is_open
+        counts = await client.get_variable_counts()
+        await client.close()
+        return results, counts
+
+    results, counts = asyncio.run(main())
+    assert not client.is_open
+    assert all("BASE" in df.columns for _, _, df in results[:4])
+    assert counts.to_dict() == {r: 2 for r in ["BASE", *run_names]}
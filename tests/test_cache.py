@@ -0,0 +1,127 @@
+from pathlib import Path
+from typing import Callable
+
+import pandas as pd
+import pytest
+
+import csdb
+from csdb.cache import ResultCache
+
+
+def make_frame(rows: int) -> pd.DataFrame:
+    return pd.DataFrame({"value": [float(i) for i in range(rows)]})
+
+
+def test_result_cache_lru_by_size():
+    size = int(make_frame(100).memory_usage(index=True, deep=True).sum())
+    cache = ResultCache(max_size=2 * size)
+    cache.put("a", make_frame(100), cache.generation)
+    cache.put("b", make_frame(100), cache.generation)
+    assert cache.get("a") is not None  # "a" is now the most recently used
+    cache.put("c", make_frame(100), cache.generation)
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    # too large to cache at all
+    cache.put("d", make_frame(1000), cache.generation)
+    assert cache.get("d") is None
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions) == (2, 2, 1)
+    assert stats.entries == len(cache) == 2
+    assert stats.size == 2 * size
+
+
+def test_result_cache_generation():
+    cache = ResultCache(max_size=2**20)
+    generation = cache.generation
+    cache.put("a", make_frame(10), generation)
+    cache.invalidate()
+    assert cache.get("a") is None
+    # a result read before the write isn't stored after it
+    cache.put("a", make_frame(10), generation)
+    assert cache.get("a") is None
+    assert cache.stats().generation == generation + 1
+
+
+def test_result_cache_returns_copies():
+    cache = ResultCache(max_size=2**20)
+    df = make_frame(10)
+    cache.put("a", df, cache.generation)
+    df.loc[0, "value"] = -1.0
+    cached = cache.get("a")
+    assert cached.loc[0, "value"] == 0.0
+    cached.loc[0, "value"] = -1.0
+    assert cache.get("a").loc[0, "value"] == 0.0
+
+
+def test_client_cache(
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    client = client_with_variables(["S_OROVL"], cache_size=2**24)
+    df_in = make_run_frame("RUN1", ["S_OROVL"])
+    client.put_run_from_dataframe("RUN1", df_in)
+    before = client.cache.stats()
+    _, _, df = client.get_result_by_variable("S_OROVL")
+    _, _, df = client.get_result_by_variable(code_name="S_OROVL")
+    after = client.cache.stats()
+    assert after.hits - before.hits == 1
+    assert after.misses - before.misses == 1
+    assert df.columns.tolist() == ["RUN1"]
+    # writes through the client invalidate the cache
+    client.put_run_from_dataframe("RUN2", df_in.assign(run="RUN2"))
+    assert len(client.cache) == 1  # only the result returned by the put
+    _, _, df = client.get_result_by_variable("S_OROVL")
+    assert df.columns.tolist() == ["RUN1", "RUN2"]
+    client.delete_run("RUN2")
+    _, _, df = client.get_result_by_variable("S_OROVL")
+    assert df.columns.tolist() == ["RUN1"]
+    # the arguments are part of the key
+    assert len(client.query(runs=["RUN1"], end="1921-12-31")) == 3
+    assert len(client.query(runs=["RUN1"], end="1922-01-31")) == 4
+
+
+def test_client_cache_generator_arguments(
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    client = client_with_variables(["S_OROVL"], cache_size=2**24)
+    df_in = make_run_frame("RUN1", ["S_OROVL"])
+    client.put_run_from_dataframe("RUN1", df_in)
+    client.put_run_from_dataframe("RUN2", df_in.assign(run="RUN2"))
+    # the generator is read once, for both the key and the query
+    assert len(client.query(runs=(r for r in ["RUN1"]))) == 12
+    assert len(client.query(runs=["RUN1"])) == 12
+    df = client.compare_runs("RUN1", (r for r in ["RUN2"]))
+    assert len(df) == 12
+    assert len(client.compare_runs("RUN1", ["RUN2"])) == 12
+
+
+@pytest.mark.parametrize("output", ["pandas", "polars"])
+def test_client_cache_returns_copies(
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+    output: str,
+):
+    if output == "polars":
+        pytest.importorskip("polars", exc_type=ImportError)
+    client = client_with_variables(["S_OROVL"], cache_size=2**24)
+    client.put_run_from_dataframe("RUN1", make_run_frame("RUN1", ["S_OROVL"]))
+    # the result of the miss that fills the cache, and of the hit, are both copies
+    for _ in range(2):
+        s = client.get_variable_counts()
+        s.iloc[0] = 999
+        data = client.query(runs="RUN1", output=output)
+        if output == "polars":
+            data[0, "value"] = 999.0
+        else:
+            data.loc[0, "value"] = 999.0
+    assert client.get_variable_counts().to_dict() == {"RUN1": 1}
+    assert client.query(runs="RUN1", output=output)["value"][0] == 0.0
+    assert client.cache.stats().hits == 4
+
+
+def test_client_without_cache(temp_database_path: Path):
+    client = csdb.Client(temp_database_path, fill_vars_if_new=False)
+    assert client.cache is None
+    with pytest.raises(ValueError):
+        client.get_variable("NOT_A_VARIABLE")
@@ -1,11 +1,15 @@
 import contextlib
 import os
+from datetime import date
 from pathlib import Path
+from typing import Callable
 
+import duckdb
 import pandas as pd
 import pytest
 
 import csdb
+from csdb.client import _digest_series
 
 
 @contextlib.contextmanager
@@ -225,3 +229,764 @@ def test_get_variable_counts_by_run(
     assert s.name == "variable_counts"
     assert s.index.name == "run_name"
     assert s["RUN1"] == 2
+
+
+def test_client_context_manager(
+    single_run_single_result_db: Path,
+):
+    client = csdb.Client(single_run_single_result_db)
+    assert not client.is_open
+    with client.open(read_only=True):
+        assert client.is_open
+        for _ in range(3):
+            run, vars, df = client.get_result_by_run(run_name="TEST")
+            assert run.name == "TEST"
+            assert df.index.max() == pd.to_datetime("2021-09-30")
+    assert not client.is_open
+    # the client still works after closing, opening a connection per call
+    run, vars, df = client.get_result_by_run(run_name="TEST")
+    assert run.name == "TEST"
+
+
+def test_client_open_cursor_per_thread(
+    single_run_single_result_db: Path,
+):
+    from concurrent.futures import ThreadPoolExecutor
+
+    with csdb.Client(single_run_single_result_db).open(read_only=True) as client:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(client.get_variable, ["S_OROVL"] * 8))
+    assert all(v.code_name == "S_OROVL" for v in results)
+
+
+def test_client_open_releases_thread_cursors(
+    single_run_single_result_db: Path,
+):
+    import gc
+    import threading
+    import weakref
+
+    cursors = list()
+
+    def read():
+        client.get_variable("S_OROVL")
+        cursors.append(weakref.ref(client._cursor()))
+
+    with csdb.Client(single_run_single_result_db).open(read_only=True) as client:
+        for _ in range(8):
+            thread = threading.Thread(target=read)
+            thread.start()
+            thread.join()
+        del thread
+        gc.collect()
+        # the cursors of the threads that have finished aren't kept open
+        assert len(cursors) == 8
+        assert all(ref() is None for ref in cursors)
+        assert client.get_variable("S_OROVL").code_name == "S_OROVL"
+
+
+def test_client_open_writes(
+    temp_database_path: Path,
+):
+    with csdb.Client(temp_database_path, fill_vars_if_new=False) as client:
+        client.put_variable(name="test", code_name="TEST1", kind="test", units="test")
+        assert client.get_variable(code_name="TEST1").name == "test"
+        df = pd.DataFrame(
+            {
+                "run": "RUN1",
+                "datetime": pd.date_range("1921-10-31", periods=12, freq="ME"),
+                "variable": "TEST1",
+                "value": range(12),
+            }
+        )
+        run, vars, df = client.put_run_from_dataframe("RUN1", df)
+        assert run.name == "RUN1"
+        assert len(df) == 12
+
+
+@pytest.mark.parametrize("method", ["frame", "csv"])
+def test_put_run_from_dataframe_methods(
+    method: str,
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    client = client_with_variables(["S_OROVL", "C_CAA003"])
+    df_in = make_run_frame("RUN1", ["S_OROVL", "C_CAA003"], periods=24)
+    run, vars, df = client.put_run_from_dataframe("RUN1", df_in, method=method)
+    assert len(vars) == 2
+    assert df.shape == (24, 2)
+    assert df.index.min() == pd.to_datetime("1921-10-31")
+    assert df.loc["1923-09-30", "C_CAA003"] == 33.0
+    df_result = client.get_table_as_dataframe("result")
+    assert str(df_result["datetime"].dtype).startswith("datetime64")
+    assert str(df_result["value"].dtype) == "float32"
+
+
+def test_put_run_from_dataframe_missing_variable(
+    temp_database_path: Path,
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    client = csdb.Client(temp_database_path, fill_vars_if_new=False)
+    client.put_variable(name="Oroville", code_name="S_OROVL", kind="test", units="test")
+    df_in = make_run_frame("RUN1", ["S_OROVL", "NOT_A_VARIABLE"])
+    with pytest.raises(ValueError):
+        client.put_run_from_dataframe("RUN1", df_in)
+    # the run isn't left behind without its results
+    assert len(client.get_table_as_dataframe("run")) == 0
+    assert len(client.get_table_as_dataframe("result")) == 0
+
+
+@pytest.mark.parametrize("max_workers, ordered", [(1, True), (2, True), (2, False)])
+def test_put_runs_from_dss(
+    single_timeseries_dss_7: Path,
+    multi_timeseries_dss_7: Path,
+    max_workers: int,
+    ordered: bool,
+    client_with_variables: Callable[..., csdb.Client],
+):
+    client = client_with_variables(["S_OROVL", "C_CAA003"])
+    runs = client.put_runs_from_dss(
+        {"RUN1": single_timeseries_dss_7, "RUN2": multi_timeseries_dss_7},
+        max_workers=max_workers,
+        ordered=ordered,
+    )
+    assert {run.name for run in runs} == {"RUN1", "RUN2"}
+    if ordered:
+        assert [run.name for run in runs] == ["RUN1", "RUN2"]
+    s = client.get_variable_counts()
+    assert s["RUN1"] == 1
+    assert s["RUN2"] == 2
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 10])
+def test_put_run_from_dss_streaming(
+    multi_timeseries_dss_7: Path,
+    chunk_size: int,
+    monkeypatch: pytest.MonkeyPatch,
+    client_with_variables: Callable[..., csdb.Client],
+):
+    client = client_with_variables(["S_OROVL", "C_CAA003"])
+    # the whole run is never read back into memory
+    with monkeypatch.context() as m:
+        m.setattr(csdb.Client, "get_result_by_run", None)
+        m.setattr(csdb.Client, "_pivot_results", None)
+        run = client.put_run_from_dss(
+            src=multi_timeseries_dss_7,
+            run_name="RUN1",
+            chunk_size=chunk_size,
+        )
+    assert run == csdb.Run(name="RUN1", source=str(multi_timeseries_dss_7))
+    _, _, df = client.get_result_by_run("RUN1")
+    assert set(df.columns) == {"S_OROVL", "C_CAA003"}
+    assert df.count().sum() == 1212 + 1200
+    assert df.index.max() == pd.to_datetime("2021-09-30")
+
+
+def test_put_run_from_dss_skip_unchanged(
+    temp_database_path: Path,
+    multi_timeseries_dss_7: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    import shutil
+
+    dss = temp_database_path.parent / "run.dss"
+    shutil.copy(multi_timeseries_dss_7, dss)
+    client = csdb.Client(temp_database_path, fill_vars_if_new=False)
+    client.put_variable(name="Oroville", code_name="S_OROVL", kind="test", units="test")
+    client.put_run_from_dss(src=dss, run_name="RUN1")
+    # Unchanged files aren't read again, and nothing is read back
+    with monkeypatch.context() as m:
+        m.setattr(csdb.io, "DssReader", None)
+        m.setattr(csdb.Client, "get_result_by_run", None)
+        run = client.put_run_from_dss(src=dss, run_name="RUN1")
+        os.utime(dss, (0, 0))  # touched, but the contents are the same
+        run = client.put_run_from_dss(src=dss, run_name="RUN1")
+        # the new time was stored, so the file isn't hashed again
+        m.setattr(csdb.io, "hash_file", None)
+        run = client.put_run_from_dss(src=dss, run_name="RUN1")
+    assert run.name == "RUN1"
+    _, _, df = client.get_result_by_run("RUN1")
+    assert list(df.columns) == ["S_OROVL"]
+    # New variables in the database mean the file is read again
+    client.put_variable(name="Banks", code_name="C_CAA003", kind="test", units="test")
+    run, vars, df = client.put_run_from_dss(src=dss, run_name="RUN1")
+    assert set(df.columns) == {"S_OROVL", "C_CAA003"}
+    assert df.count().sum() == 1212 + 1200
+    # Forcing a read replaces the results from that file
+    run, vars, df = client.put_run_from_dss(
+        src=dss, run_name="RUN1", skip_unchanged=False
+    )
+    assert df.count().sum() == 1212 + 1200
+    client.delete_run("RUN1")
+    assert len(client.get_table_as_dataframe("run")) == 0
+
+
+@pytest.mark.parametrize("many", [False, True])
+def test_put_run_from_dss_replaces_source_results(
+    temp_database_path: Path,
+    single_timeseries_dss_7: Path,
+    single_timeseries_2_dss_7: Path,
+    multi_timeseries_dss_7: Path,
+    many: bool,
+    client_with_variables: Callable[..., csdb.Client],
+):
+    import shutil
+
+    def put(src: Path):
+        if many:
+            client.put_runs_from_dss({"RUN1": src}, max_workers=1)
+        else:
+            client.put_run_from_dss(src=src, run_name="RUN1")
+
+    dss = temp_database_path.parent / "run.dss"
+    shutil.copy(multi_timeseries_dss_7, dss)
+    client = client_with_variables(["S_OROVL", "C_CAA003", "S_OROVL_2"])
+    put(dss)
+    put(single_timeseries_2_dss_7)
+    assert client.get_variable_counts().to_dict() == {"RUN1": 3}
+    # C_CAA003 is no longer in the file, so its results are removed with the rest
+    shutil.copy(single_timeseries_dss_7, dss)
+    put(dss)
+    _, _, df = client.get_result_by_run("RUN1")
+    assert list(df.columns) == ["S_OROVL", "S_OROVL_2"]
+
+
+def test_put_runs_from_dss_unique(
+    single_timeseries_dss_7: Path,
+    client_with_variables: Callable[..., csdb.Client],
+):
+    client = client_with_variables(["S_OROVL"])
+    # a file given for two runs would only be written to one of them
+    with pytest.raises(ValueError):
+        client.put_runs_from_dss(
+            {"RUN1": single_timeseries_dss_7, "RUN2": str(single_timeseries_dss_7)}
+        )
+    with pytest.raises(ValueError):
+        client.put_runs_from_dss([single_timeseries_dss_7, single_timeseries_dss_7])
+    assert len(client.get_table_as_dataframe("run")) == 0
+
+
+def test_put_runs_from_dss_skip_unchanged(
+    temp_database_path: Path,
+    single_timeseries_dss_7: Path,
+    multi_timeseries_dss_7: Path,
+):
+    client = csdb.Client(temp_database_path, fill_vars_if_new=False)
+    client.put_variable(name="Oroville", code_name="S_OROVL", kind="test", units="test")
+    sources = {"RUN1": single_timeseries_dss_7, "RUN2": multi_timeseries_dss_7}
+    runs = client.put_runs_from_dss(sources, max_workers=1)
+    assert [run.name for run in runs] == ["RUN1", "RUN2"]
+    runs = client.put_runs_from_dss(sources, max_workers=1)
+    assert runs == []
+
+
+def test_put_variables_from_dataframe_quotes_and_duplicates(
+    temp_database_path: Path,
+):
+    df = pd.DataFrame(
+        data={
+            "Name": ["Farmer's Canal", "Duplicate", "Test Variable 2"],
+            "Code_Name": ["TEST1", "TEST1", "TEST2"],
+            "Kind": ["TEST", "TEST", "TEST"],
+            "Units": ["big_ones", "big_ones", "little_ones"],
+        }
+    )
+    client = csdb.Client(temp_database_path, fill_vars_if_new=False)
+    client.put_variables_from_dataframe(df)
+    assert list(df.columns) == ["Name", "Code_Name", "Kind", "Units"]
+    assert client.get_variable(code_name="TEST1").name == "Farmer's Canal"
+    assert len(client.get_table_as_dataframe("variable")) == 2
+    # existing variables are left alone
+    client.put_variables_from_dataframe(df)
+    assert len(client.get_table_as_dataframe("variable")) == 2
+
+
+def test_put_run_from_dss_caches_catalog(
+    temp_database_path: Path,
+    multi_timeseries_dss_7: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    import shutil
+
+    dss = temp_database_path.parent / "run.dss"
+    shutil.copy(multi_timeseries_dss_7, dss)
+    client = csdb.Client(temp_database_path, fill_vars_if_new=False)
+    client.put_variable(name="Oroville", code_name="S_OROVL", kind="test", units="test")
+    client.put_run_from_dss(src=dss, run_name="RUN1")
+    with duckdb.connect(temp_database_path, read_only=True) as conn:
+        df_catalog = conn.sql("SELECT * FROM dss_catalog").df()
+    assert set(df_catalog["b"]) == {"S_OROVL", "C_CAA003"}
+    # A second read of the same file uses the cached catalog
+    with monkeypatch.context() as m:
+        m.setattr(csdb.io.DssReader, "catalog", property(lambda self: None))
+        m.setattr(
+            csdb.io.DssReader,
+            "get_intersecting_catalog",
+            lambda self, b_parts: [p for p in self._catalog if p.B in b_parts],
+        )
+        client.put_run_from_dss(src=dss, run_name="RUN2")
+    # Changing the file invalidates the cached catalog
+    os.utime(dss, (0, 0))
+    client.put_run_from_dss(src=dss, run_name="RUN3")
+    with duckdb.connect(temp_database_path, read_only=True) as conn:
+        df_catalog = conn.sql("SELECT * FROM dss_catalog").df()
+    assert len(df_catalog) == 2
+    assert (df_catalog["mtime"] == 0).all()
+    assert client.get_variable_counts().to_dict() == {"RUN1": 1, "RUN2": 1, "RUN3": 1}
+
+
+def test_dss_catalog_cache_keeps_order(
+    temp_database_path: Path,
+    multi_timeseries_dss_7: Path,
+    client_with_variables: Callable[..., csdb.Client],
+):
+    client = client_with_variables(["S_OROVL", "C_CAA003"])
+    client.put_run_from_dss(src=multi_timeseries_dss_7, run_name="RUN1")
+    src = multi_timeseries_dss_7.absolute()
+    # the rows are stored in the reverse order, the catalog is read in the order of
+    # the file all the same
+    with duckdb.connect(temp_database_path) as conn:
+        conn.execute(
+            """CREATE TEMP TABLE reversed AS
+            SELECT * FROM dss_catalog ORDER BY ordinal DESC;"""
+        )
+        conn.execute("DELETE FROM dss_catalog;")
+        conn.execute("INSERT INTO dss_catalog SELECT * FROM reversed;")
+    with client._connect() as conn:
+        cached = client._get_dss_catalog(conn, src)
+    b_parts = ["S_OROVL", "C_CAA003"]
+    with csdb.io.DssReader(src) as fresh, csdb.io.DssReader(src, cached) as reader:
+        assert [str(p) for p in reader.catalog] == [str(p) for p in fresh.catalog]
+        assert [str(p) for p in reader.get_intersecting_catalog(b_parts)] == [
+            str(p) for p in fresh.get_intersecting_catalog(b_parts)
+        ]
+
+
+def test_get_result_metadata_in_bulk(
+    monkeypatch: pytest.MonkeyPatch,
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    code_names = ["S_OROVL", "C_CAA003", "S_SHSTA"]
+    client = client_with_variables(code_names)
+    for run_name in ("RUN1", "RUN2"):
+        client.put_run_from_dataframe(run_name, make_run_frame(run_name, code_names))
+    # the metadata is resolved without a lookup per column
+    monkeypatch.setattr(csdb.Client, "get_variable", None)
+    monkeypatch.setattr(csdb.Client, "_get_run", None)
+    run, variables, df = client.get_result_by_run("RUN1")
+    assert run.name == "RUN1"
+    assert [v.code_name for v in variables] == df.columns.tolist()
+    runs, variable, df = client.get_result_by_variable("C_CAA003")
+    assert variable.code_name == "C_CAA003"
+    assert [r.name for r in runs] == df.columns.tolist() == ["RUN1", "RUN2"]
+    with pytest.raises(ValueError):
+        client.get_result_by_variable("NOT_A_VARIABLE")
+
+
+def test_query(
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    code_names = ["S_OROVL", "C_CAA003", "S_SHSTA"]
+    client = client_with_variables(code_names)
+    for run_name in ("RUN1", "RUN2", "RUN3"):
+        client.put_run_from_dataframe(run_name, make_run_frame(run_name, code_names))
+    df = client.query(
+        runs=["RUN1", "RUN3"],
+        variables=["S_OROVL", "S_SHSTA"],
+        start="1922-01-01",
+        end="1922-06-30",
+    )
+    assert df.columns.tolist() == ["run", "variable", "datetime", "value"]
+    assert len(df) == 2 * 2 * 6
+    assert set(df["run"]) == {"RUN1", "RUN3"}
+    assert set(df["variable"]) == {"S_OROVL", "S_SHSTA"}
+    assert df["datetime"].min() == pd.Timestamp("1922-01-31")
+    assert df["datetime"].max() == pd.Timestamp("1922-06-30")
+    df = client.query(variables="C_CAA003", wide=True)
+    assert df.shape == (12, 3)
+    assert df.columns.names == ["run", "variable"]
+    assert df.loc["1921-11-30", ("RUN2", "C_CAA003")] == 11.0
+    assert len(client.query(runs=[])) == 0
+    assert len(client.query()) == 3 * 3 * 12
+
+
+def test_get_result_pivot_matches_pandas(
+    temp_database_path: Path, make_run_frame: Callable[..., pd.DataFrame]
+):
+    client = csdb.Client(temp_database_path, fill_vars_if_new=False)
+    # names that need quoting, or differ only by case, keep their own columns
+    code_names = ["S_OROVL", "s_orovl", "O'NEILL", "C_CAA003"]
+    client.put_variables_from_dataframe(
+        pd.DataFrame({"name": code_names, "code_name": code_names, "kind": "t"}).assign(
+            units="t"
+        )
+    )
+    df_in = make_run_frame("RUN1", code_names, periods=24)
+    # a shorter series leaves missing values in the wide table
+    df_in = df_in.loc[~((df_in["variable"] == "C_CAA003") & (df_in.index % 24 > 11))]
+    client.put_run_from_dataframe("RUN1", df_in)
+    client.put_run_from_dataframe("RUN'2", make_run_frame("RUN'2", ["S_OROVL"]))
+    _, _, df = client.get_result_by_run("RUN1")
+    expected = df_in.pivot(index="datetime", columns="variable", values="value")
+    pd.testing.assert_frame_equal(
+        df, expected, check_dtype=False, check_index_type=False
+    )
+    assert df.index.name == "datetime"
+    assert df.columns.name == "variable"
+    runs, _, df = client.get_result_by_variable("S_OROVL")
+    assert [r.name for r in runs] == df.columns.tolist() == ["RUN'2", "RUN1"]
+    assert df["RUN'2"].isna().sum() == 12
+    df = client.query(variables=["S_OROVL", "O'NEILL"], wide=True)
+    assert df.columns.tolist() == [
+        ("RUN'2", "S_OROVL"),
+        ("RUN1", "O'NEILL"),
+        ("RUN1", "S_OROVL"),
+    ]
+
+
+def test_aggregate(
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    code_names = ["S_OROVL", "C_CAA003"]
+    client = client_with_variables(code_names)
+    for run_name in ("RUN1", "RUN2"):
+        df_in = make_run_frame(run_name, code_names, periods=24)
+        client.put_run_from_dataframe(run_name, df_in)
+    df = client.aggregate(by="water_year", how="sum")
+    assert df.columns.tolist() == ["run", "variable", "water_year", "value"]
+    assert len(df) == 2 * 2 * 2
+    df = df.set_index(["run", "variable", "water_year"])["value"]
+    # October 1921 through September 1922 is water year 1922
+    assert df[("RUN1", "S_OROVL", 1922)] == sum(range(12))
+    assert df[("RUN2", "C_CAA003", 1923)] == sum(range(12, 24)) + 10 * 12
+    df = client.aggregate(runs="RUN1", variables="S_OROVL", by="calendar_year")
+    assert df["calendar_year"].tolist() == [1921, 1922, 1923]
+    assert df["value"].tolist() == [1.0, 8.5, 19.0]
+    df = client.aggregate(runs="RUN1", variables="S_OROVL", by="month", how="max")
+    assert len(df) == 12
+    assert df.set_index("month").loc[10, "value"] == 12.0
+    df = client.aggregate(by="period_of_record", how="count", end="1922-09-30")
+    assert df.columns.tolist() == ["run", "variable", "value"]
+    assert (df["value"] == 12).all()
+    with pytest.raises(ValueError):
+        client.aggregate(by="week")
+    with pytest.raises(ValueError):
+        client.aggregate(how="mode")
+
+
+def test_exceedance(
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    code_names = ["S_OROVL", "WYT_SAC_"]
+    client = client_with_variables(code_names)
+    df_in = make_run_frame("RUN1", ["S_OROVL"], periods=24)
+    # the first water year is wet (1), the second is critical (5)
+    df_wyt = make_run_frame("RUN1", ["WYT_SAC_"], periods=24)
+    df_wyt["value"] = [1.0] * 12 + [5.0] * 12
+    client.put_run_from_dataframe("RUN1", pd.concat([df_in, df_wyt]))
+    df = client.exceedance(variables="S_OROVL")
+    assert df.columns.tolist() == ["run", "variable", "probability", "value"]
+    assert len(df) == 24
+    assert df["probability"].iloc[0] == 1 / 25
+    assert df["value"].iloc[0] == 23.0
+    assert df["value"].is_monotonic_decreasing
+    df = client.exceedance(variables="S_OROVL", probabilities=[0.5, 0.0, 1.0])
+    assert df["probability"].tolist() == [0.0, 0.5, 1.0]
+    assert df["value"].tolist() == [23.0, 11.5, 0.0]
+    # October of both years
+    df = client.exceedance(variables="S_OROVL", months=10)
+    assert df["value"].tolist() == [12.0, 0.0]
+    df = client.exceedance(variables="S_OROVL", water_year_types=[5], months=[10, 11])
+    assert df["value"].tolist() == [13.0, 12.0]
+    with pytest.raises(ValueError):
+        client.exceedance(probabilities=[50])
+
+
+def test_compare_runs(
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    code_names = ["S_OROVL", "C_CAA003"]
+    client = client_with_variables(code_names)
+    for run_name, scale in (("BASE", 1.0), ("ALT1", 2.0), ("ALT2", 0.5)):
+        df_in = make_run_frame(run_name, code_names, periods=24)
+        df_in["value"] = (df_in["value"] + 1) * scale
+        client.put_run_from_dataframe(run_name, df_in)
+    df = client.compare_runs("BASE", ["ALT1", "ALT2"], variables="S_OROVL")
+    assert df.columns.tolist() == [
+        "run",
+        "variable",
+        "datetime",
+        "base",
+        "alt",
+        "difference",
+    ]
+    assert len(df) == 2 * 24
+    assert set(df["run"]) == {"ALT1", "ALT2"}
+    alt1 = df.loc[df["run"] == "ALT1"]
+    assert (alt1["difference"] == alt1["base"]).all()
+    df = client.compare_runs("BASE", "ALT2", how="percent")
+    assert len(df) == 2 * 24
+    assert (df["difference"] == -50.0).all()
+    df = client.compare_runs("BASE", "ALT1", by="water_year", agg="sum")
+    assert df.columns.tolist()[:3] == ["run", "variable", "water_year"]
+    df = df.set_index(["variable", "water_year"])
+    assert df.loc[("S_OROVL", 1922), "difference"] == sum(range(1, 13))
+    df = client.compare_runs("BASE", "ALT1", by="period_of_record")
+    assert df.columns.tolist() == ["run", "variable", "base", "alt", "difference"]
+    assert len(df) == 2
+    with pytest.raises(ValueError):
+        client.compare_runs("BASE", "NOT_A_RUN")
+    with pytest.raises(ValueError):
+        client.compare_runs("BASE", "ALT1", how="ratio")
+
+
+@pytest.mark.parametrize("output", ["pandas", "arrow", "polars", "numpy"])
+def test_read_output_formats(
+    output: str,
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    module = {"arrow": "pyarrow", "polars": "polars"}.get(output)
+    if module is not None:
+        pytest.importorskip(module, exc_type=ImportError)
+    code_names = ["S_OROVL", "C_CAA003"]
+    client = client_with_variables(code_names)
+    for run_name in ("RUN1", "RUN2"):
+        client.put_run_from_dataframe(run_name, make_run_frame(run_name, code_names))
+
+    def columns(data) -> list[str]:
+        if output == "pandas" and data.index.name is not None:
+            return [data.index.name, *data.columns]
+        if output == "arrow":
+            return data.column_names
+        return list(data)
+
+    def rows(data) -> int:
+        if output == "numpy":
+            return len(next(iter(data.values())))
+        return len(data)
+
+    _, _, data = client.get_result_by_run("RUN1", output=output)
+    assert columns(data) == ["datetime", "C_CAA003", "S_OROVL"]
+    assert rows(data) == 12
+    _, _, data = client.get_result_by_variable("S_OROVL", output=output)
+    assert columns(data) == ["datetime", "RUN1", "RUN2"]
+    data = client.get_table_as_dataframe("variable", output=output)
+    assert columns(data)[1:] == ["name", "code_name", "kind", "units"]
+    data = client.query(runs="RUN2", output=output)
+    assert columns(data)[-4:] == ["run", "variable", "datetime", "value"]
+    assert rows(data) == 24
+    data = client.aggregate(by="period_of_record", output=output)
+    assert rows(data) == 4
+    data = client.exceedance(probabilities=[0.5], output=output)
+    assert rows(data) == 4
+    data = client.compare_runs("RUN1", "RUN2", output=output)
+    assert rows(data) == 24
+    if output != "pandas":
+        data = client.query(variables="S_OROVL", wide=True, output=output)
+        assert columns(data) == ["datetime", "RUN1/S_OROVL", "RUN2/S_OROVL"]
+
+
+def test_read_output_format_unknown(temp_database_path: Path):
+    client = csdb.Client(temp_database_path, fill_vars_if_new=False)
+    with pytest.raises(ValueError):
+        client.query(output="excel")
+
+
+def test_read_output_format_datetime_column(
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    code_names = ["S_OROVL", "datetime"]
+    client = client_with_variables(code_names)
+    for run_name in ("RUN1", "datetime"):
+        client.put_run_from_dataframe(run_name, make_run_frame(run_name, code_names))
+    _, _, df = client.get_result_by_run("RUN1")
+    assert df.columns.tolist() == ["S_OROVL", "datetime"]
+    with pytest.raises(ValueError):
+        client.get_result_by_run("RUN1", output="numpy")
+    with pytest.raises(ValueError):
+        client.get_result_by_variable("S_OROVL", output="numpy")
+    data = client.query(variables="S_OROVL", wide=True, output="numpy")
+    assert list(data) == ["datetime", "RUN1/S_OROVL", "datetime/S_OROVL"]
+
+
+def test_results_relation(
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    code_names = ["S_OROVL", "C_CAA003"]
+    client = client_with_variables(code_names)
+    for run_name in ("RUN1", "RUN2"):
+        client.put_run_from_dataframe(run_name, make_run_frame(run_name, code_names))
+    with pytest.raises(duckdb.ConnectionException):
+        client.results()
+    with client.open(read_only=True):
+        rel = client.results(variables="S_OROVL")
+        assert rel.columns == ["run", "variable", "kind", "datetime", "value"]
+        rel = rel.filter("month(datetime) = 12").aggregate("run, max(value) AS high")
+        df = rel.order("run").df()
+        assert df["run"].tolist() == ["RUN1", "RUN2"]
+        assert df["high"].tolist() == [2.0, 2.0]
+        assert len(client.results(runs="RUN2", end="1921-12-31")) == 3 * 2
+
+
+def test_lookups_with_quotes(temp_database_path: Path):
+    client = csdb.Client(temp_database_path, fill_vars_if_new=False)
+    client.put_variable(name="O'Neill", code_name="S_ONEILL'", kind="t", units="t")
+    client._put_run("Alt '1'", "run's.dss")
+    with client.open():
+        # the second call re-uses the statement parsed by the first
+        for _ in range(2):
+            variable = client.get_variable("S_ONEILL'")
+            assert variable.name == "O'Neill"
+            run = client._get_run("Alt '1'")
+            assert run.source == "run's.dss"
+        with pytest.raises(ValueError):
+            client.get_variable("S_ONEILL")
+        with pytest.raises(ValueError):
+            client._get_run("Alt 1")
+
+
+@pytest.mark.parametrize("schema_profile", ["default", "archive", "dense", "dedup"])
+def test_put_run_from_dataframe_bulk(
+    temp_database_path: Path,
+    schema_profile: str,
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    code_names = ["S_OROVL", "C_CAA003"]
+    client = client_with_variables(code_names, schema_profile=schema_profile)
+    df_in = make_run_frame("RUN1", code_names, periods=24)
+    # the other profiles validate every write in bulk, whatever the method
+    method = "bulk" if schema_profile == "default" else "frame"
+    _, _, df = client.put_run_from_dataframe("RUN1", df_in, method=method)
+    assert df.shape == (24, 2)
+    # duplicate dates in the new data
+    df_dupe = make_run_frame("RUN2", code_names)
+    df_dupe = pd.concat([df_dupe, df_dupe.iloc[:1]])
+    with pytest.raises(duckdb.ConstraintException):
+        client.put_run_from_dataframe("RUN2", df_dupe, method=method)
+    # missing values are rejected the same way by every profile
+    df_nan = make_run_frame("RUN2", code_names)
+    df_nan.loc[3, "value"] = float("nan")
+    with pytest.raises(duckdb.ConstraintException):
+        client.put_run_from_dataframe("RUN2", df_nan, method=method)
+    # dates the run already has
+    df_more = make_run_frame("RUN1", ["S_OROVL"], periods=36).iloc[20:]
+    with pytest.raises(duckdb.ConstraintException):
+        client.put_run_from_dataframe("RUN1", df_more, method=method)
+    with pytest.raises(ValueError):
+        client.put_run_from_dataframe(
+            "RUN3", make_run_frame("RUN3", ["NOT_A_VARIABLE"]), method=method
+        )
+    # nothing from the failed writes is left behind
+    assert client.get_variable_counts().to_dict() == {"RUN1": 2}
+    assert len(client.get_table_as_dataframe("result")) == 48
+    # new dates for the run are appended
+    client.put_run_from_dataframe("RUN1", df_more.iloc[4:], method=method)
+    assert len(client.get_table_as_dataframe("result")) == 48 + 12
+    with duckdb.connect(temp_database_path, read_only=True) as conn:
+        (unique,) = conn.execute(
+            """SELECT count(*) FROM duckdb_constraints()
+            WHERE table_name = 'result' AND constraint_type = 'UNIQUE'"""
+        ).fetchone()
+    assert bool(unique) == (schema_profile == "default")
+
+
+def test_dense_layout(
+    temp_database_path: Path,
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    code_names = ["S_OROVL", "C_CAA003"]
+    client = client_with_variables(code_names, schema_profile="dense")
+    df_in = make_run_frame("RUN1", code_names, periods=24)
+    # a gap in one series is kept as missing months
+    df_in = df_in.drop(index=[5, 6])
+    _, _, df = client.put_run_from_dataframe("RUN1", df_in)
+    assert df.shape == (24, 2)
+    assert df["S_OROVL"].isna().sum() == 2
+    with duckdb.connect(temp_database_path, read_only=True) as conn:
+        lengths = conn.sql("SELECT len(value) FROM series ORDER BY variable_id")
+        assert lengths.fetchall() == [(24,), (24,)]
+    # results appended to a series are merged into it
+    df_more = make_run_frame("RUN1", ["S_OROVL"], periods=30).iloc[24:]
+    client.put_run_from_dataframe("RUN1", df_more)
+    _, _, df = client.get_result_by_variable("S_OROVL")
+    assert len(df) == 30 - 2  # the gap isn't read back as results
+    assert df.iloc[-1, 0] == 29.0
+    # the queries read the series through the result view
+    df = client.query(runs=["RUN1"], variables=["C_CAA003"])
+    assert df["value"].tolist() == [float(10 + i) for i in range(24)]
+    # only monthly, end-of-month results
+    df_daily = make_run_frame("RUN2", ["S_OROVL"]).assign(
+        datetime=pd.date_range("1921-10-01", periods=12, freq="D")
+    )
+    with pytest.raises(ValueError):
+        client.put_run_from_dataframe("RUN2", df_daily)
+    client.put_run_from_dataframe("RUN2", make_run_frame("RUN2", code_names))
+    client.delete_run("RUN1")
+    with duckdb.connect(temp_database_path, read_only=True) as conn:
+        assert conn.sql("SELECT count(*) FROM series").fetchone() == (2,)
+    assert client.get_variable_counts().to_dict() == {"RUN2": 2}
+
+
+def test_dedup_layout(
+    temp_database_path: Path,
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+):
+    code_names = ["S_OROVL", "C_CAA003"]
+    client = client_with_variables(code_names, schema_profile="dedup")
+
+    def payloads() -> int:
+        with duckdb.connect(temp_database_path, read_only=True) as conn:
+            return conn.sql("SELECT count(*) FROM payload").fetchone()[0]
+
+    df_base = make_run_frame("BASE", code_names, periods=24)
+    client.put_run_from_dataframe("BASE", df_base)
+    assert payloads() == 2
+    # an alternative that only changes one variable shares the other series
+    df_alt = df_base.assign(run="ALT")
+    df_alt.loc[df_alt["variable"] == "C_CAA003", "value"] += 1.0
+    client.put_run_from_dataframe("ALT", df_alt)
+    client.put_run_from_dataframe("ALT2", df_alt.assign(run="ALT2"))
+    assert payloads() == 3
+    _, _, df = client.get_result_by_variable("C_CAA003")
+    assert df.columns.tolist() == ["ALT", "ALT2", "BASE"]
+    assert (df["ALT"] - df["BASE"] == 1.0).all()
+    _, _, df = client.get_result_by_run("ALT2")
+    assert df.shape == (24, 2)
+    # the shared series are kept until no run uses them
+    client.delete_run("ALT")
+    assert payloads() == 3
+    client.delete_run("ALT2")
+    assert payloads() == 2
+    assert client.get_variable_counts().to_dict() == {"BASE": 2}
+    # the stored digests are the ones csdb computes, not duckdb's hash
+    with duckdb.connect(temp_database_path, read_only=True) as conn:
+        rows = conn.sql(
+            "SELECT digest, variable_id, start, value FROM payload ORDER BY id"
+        ).fetchall()
+    for digest, variable_id, start, value in rows:
+        assert digest == _digest_series(variable_id, start, (1, 0, 0, 0), value)
+
+
+def test_digest_series_is_stable():
+    # the digests of stored series must not change, or new runs stop sharing them
+    digest = _digest_series(1, date(1921, 10, 31), (1, 0, 0, 0), [1.0, None, 2.5])
+    assert digest == (
+        "ee4f8094319985d78c971747e17f3b4f4e63ac06d34cd87f0a945c7dfa4d2092"
+        + "c502b4611601d8d50ad8f39a1af967ebc10de5b2220c09d13bafb612c9fd0065"
+    )
+
+
+def test_schema_profile_unknown(temp_database_path: Path):
+    with pytest.raises(ValueError):
+        csdb.Client(temp_database_path, schema_profile="columnar")
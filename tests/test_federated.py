@@ -0,0 +1,69 @@
+from pathlib import Path
+from typing import Callable
+
+import duckdb
+import pandas as pd
+import pytest
+
+import csdb
+
+
+@pytest.fixture(scope="function")
+def studies(
+    tmp_path: Path,
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+) -> dict[str, Path]:
+    studies = dict()
+    # the studies have different profiles, and define their variables in a different
+    # order, so their ids don't line up
+    for i, (study, profile) in enumerate((("2020", "default"), ("2024", "dense"))):
+        src = tmp_path / f"study_{study}.db"
+        code_names = ["S_OROVL", "C_CAA003"][:: 1 if i == 0 else -1]
+        client = client_with_variables(code_names, src=src, schema_profile=profile)
+        for j, run in enumerate(("BASE", "ALT")):
+            df = make_run_frame(run, code_names, value=10.0 * i + j)
+            client.put_run_from_dataframe(run, df)
+        studies[study] = src
+    return studies
+
+
+def test_federated_client(studies: dict[str, Path]):
+    client = csdb.FederatedClient(studies)
+    assert client.studies == studies
+    runs = client.get_table_as_dataframe("run")
+    assert sorted(runs["name"]) == ["2020/ALT", "2020/BASE", "2024/ALT", "2024/BASE"]
+    assert runs["id"].is_unique
+    assert len(client.get_table_as_dataframe("variable")) == 2
+    assert client.get_variable_counts().to_dict() == {
+        "2020/ALT": 2,
+        "2020/BASE": 2,
+        "2024/ALT": 2,
+        "2024/BASE": 2,
+    }
+    _, _, df = client.get_result_by_variable("C_CAA003")
+    assert df.columns.tolist() == ["2020/ALT", "2020/BASE", "2024/ALT", "2024/BASE"]
+    assert df.iloc[0].tolist() == [1.0, 0.0, 11.0, 10.0]
+    run, variables, df = client.get_result_by_run("2024/BASE")
+    assert run.name == "2024/BASE"
+    assert df.shape == (12, 2)
+    # a comparison across the studies is one query
+    df = client.compare_runs(base="2020/BASE", alts=["2024/BASE"], by="water_year")
+    assert df["difference"].tolist() == [10.0, 10.0]
+    df = client.query(runs=["2020/ALT", "2024/ALT"], variables="S_OROVL", wide=True)
+    assert df.shape == (12, 2)
+
+
+def test_federated_client_study_names(studies: dict[str, Path]):
+    client = csdb.FederatedClient(list(studies.values()))
+    assert list(client.studies) == ["study_2020", "study_2024"]
+    with client.open():
+        assert client.get_variable("S_OROVL").code_name == "S_OROVL"
+        with pytest.raises(duckdb.InvalidInputException):
+            client.delete_run("study_2020/BASE")
+    with pytest.raises(ValueError):
+        csdb.FederatedClient({"a/b": studies["2020"]})
+    with pytest.raises(ValueError):
+        csdb.FederatedClient([studies["2020"], studies["2020"]])
+    with pytest.raises(FileNotFoundError):
+        csdb.FederatedClient([studies["2020"].parent / "missing.db"])
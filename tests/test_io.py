@@ -54,3 +54,75 @@ def test_read_multi_timeseries_from_dss(
     assert list(df.columns) == ["datetime", "variable", "value"]
     assert len(df) == 1212 + 1200
     assert df["datetime"].max() == pd.to_datetime("2021-09-30")
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3])
+def test_read_dss_in_chunks(
+    multi_timeseries_dss_7: Path,
+    chunk_size: int,
+):
+    chunks = list(
+        csdb.io.iter_load_dss_chunks(multi_timeseries_dss_7, None, chunk_size)
+    )
+    assert len(chunks) == -(-2 // chunk_size)
+    df = pd.concat(chunks, ignore_index=True)
+    df_all = csdb.io.load_dss(multi_timeseries_dss_7)
+    assert list(df.columns) == ["datetime", "variable", "value"]
+    pd.testing.assert_frame_equal(
+        df.sort_values(["variable", "datetime"], ignore_index=True),
+        df_all.sort_values(["variable", "datetime"], ignore_index=True),
+    )
+
+
+def test_dss_reader_opens_once(
+    multi_timeseries_dss_7: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    opened = list()
+    HecDss = csdb.io.hecdss.HecDss
+
+    def counting_open(*args, **kwargs):
+        opened.append(args)
+        return HecDss(*args, **kwargs)
+
+    monkeypatch.setattr(csdb.io.hecdss, "HecDss", counting_open)
+    with csdb.io.DssReader(multi_timeseries_dss_7) as reader:
+        paths = reader.get_intersecting_catalog(["s_orovl"])
+        assert [p.B for p in paths] == ["S_OROVL"]
+        assert reader.get_intersecting_catalog(["C_CAA003"]) != paths
+        df = reader.load(paths)
+    assert len(opened) == 1
+    assert set(df["variable"]) == {"S_OROVL"}
+    assert len(df) == 1212
+
+
+def test_ledger_builder_matches_melt():
+    short = pd.Series(
+        [1.0, float("nan"), 3.0],
+        index=pd.date_range("1921-10-31", periods=3, freq="ME"),
+        name="SHORT",
+    )
+    long = pd.Series(
+        range(5000),
+        index=pd.date_range("1921-10-31", periods=5000, freq="D"),
+        name="LONG",
+        dtype=float,
+    )
+    builder = csdb.io._LedgerBuilder(expected_series=2)
+    for s in (short, long):
+        builder.append(s)
+    df = builder.build()
+    expected = (
+        pd.concat([short, long], axis=1)
+        .melt(value_name="value", var_name="variable", ignore_index=False)
+        .dropna()
+        .rename_axis("datetime")
+        .reset_index()
+    )
+    assert builder.series_count == 2
+    assert len(builder) == 2 + 5000
+    pd.testing.assert_frame_equal(
+        df.sort_values(["variable", "datetime"], ignore_index=True),
+        expected.sort_values(["variable", "datetime"], ignore_index=True),
+        check_dtype=False,
+    )
@@ -0,0 +1,80 @@
+from pathlib import Path
+from typing import Callable
+
+import duckdb
+import pandas as pd
+import pytest
+
+import csdb
+
+
+@pytest.fixture(scope="function")
+def client(
+    client_with_variables: Callable[..., csdb.Client],
+    make_run_frame: Callable[..., pd.DataFrame],
+) -> csdb.Client:
+    client = client_with_variables({"S_OROVL": "STORAGE", "C_CAA003": "CHANNEL"})
+    for run in ("BASE", "ALT 1/a", "2"):
+        client.put_run_from_dataframe(run, make_run_frame(run, ["S_OROVL", "C_CAA003"]))
+    return client
+
+
+def test_export_parquet(client: csdb.Client, tmp_path: Path):
+    dst = tmp_path / "study"
+    stats = client.export_parquet(dst)
+    # one file per run and kind of variable
+    assert len(stats) == 6
+    assert stats["count"].sum() == 3 * 2 * 12
+    assert {"run", "variable_kind"} == set(stats["partition_keys"].iloc[0])
+    df = duckdb.sql(
+        f"SELECT * FROM read_parquet('{dst}/result/**/*.parquet', hive_partitioning=1)"
+    ).df()
+    assert len(df) == 3 * 2 * 12
+    with pytest.raises(duckdb.IOException):
+        client.export_parquet(dst, runs="BASE")
+    # the rejected export leaves the dataset as it was
+    reader = csdb.ParquetClient(dst)
+    _, _, df = reader.get_result_by_run("ALT 1/a")
+    assert df.shape == (12, 2)
+    assert len(reader.get_table_as_dataframe("run")) == 3
+    stats = client.export_parquet(dst, runs="BASE", overwrite=True)
+    assert len(stats) == 2
+    assert csdb.ParquetClient(dst).get_variable_counts().to_dict() == {"BASE": 2}
+    with pytest.raises(ValueError):
+        client.export_parquet(tmp_path / "other", runs=["NOT_A_RUN"])
+
+
+def test_parquet_client(client: csdb.Client, tmp_path: Path):
+    dst = tmp_path / "study"
+    client.export_parquet(dst)
+    reader = csdb.ParquetClient(dst)
+    for run in ("BASE", "ALT 1/a", "2"):
+        run_db, variables_db, df_db = client.get_result_by_run(run)
+        run_pq, variables_pq, df_pq = reader.get_result_by_run(run)
+        assert run_pq == run_db
+        assert variables_pq == variables_db
+        pd.testing.assert_frame_equal(df_pq, df_db, check_index_type=False)
+    _, _, df = reader.get_result_by_variable("S_OROVL")
+    assert df.columns.tolist() == ["2", "ALT 1/a", "BASE"]
+    pd.testing.assert_frame_equal(
+        reader.query(runs="2", variables="C_CAA003"),
+        client.query(runs="2", variables="C_CAA003"),
+    )
+    assert len(reader.get_table_as_dataframe("result")) == 3 * 2 * 12
+    assert reader.get_variable("S_OROVL").kind == "STORAGE"
+    # only the partitions of the run are scanned
+    where, params = reader._results_filter(runs="BASE")
+    with reader.open():
+        (_, plan), *_ = (
+            reader._cursor()
+            .execute(
+                f"EXPLAIN ANALYZE SELECT * FROM {reader._results_source()} {where}",
+                params,
+            )
+            .fetchall()
+        )
+    assert "Scanning Files: 2/6" in plan
+    with pytest.raises(duckdb.InvalidInputException):
+        reader.delete_run("BASE")
+    with pytest.raises(FileNotFoundError):
+        csdb.ParquetClient(tmp_path / "missing")